@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+SEO audit for sites the Meta Tags Bot manages (read-only)
+- Reads each page's <head> with the same patterns as the rewrite
+- Reports missing, repeated and over-long tags, duplicate titles and
+  descriptions across pages, and pages with more than one GA snippet
+- Keeps results in a compact index that can be saved and diffed
+
+Example: python3 meta-bot-audit.py site/ --save audit.idx --diff last.idx
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+from html import unescape
+
+from meta_bot_core import DEFAULT_EXCLUDES, HEAD_END_RE, PATTERNS, extract_text_from_meta, page_charset
+
+# Per page the index keeps STRINGS as text, HASHED as 64-bit hashes of
+# their text (0 = missing), the number of each TAGS tag and the length of
+# LENGTHS; everything sits in flat arrays, about 150 bytes a page
+STRINGS = ('path', 'title', 'ga_id')
+HASHED = ('title', 'desc', 'keywords', 'canonical', 'ga_id')
+TAGS = ('title', 'desc', 'keywords', 'canonical', 'ga')
+LENGTHS = ('title', 'desc')
+TITLE_MAX = 60
+DESC_MAX = 160
+REPORT_LIMIT = 10
+
+# Pages are read up to </head>, at most HEAD_LIMIT bytes
+HEAD_LIMIT = 256 * 1024
+READ_CHUNK = 16 * 1024
+PAGE_TAG_RE = re.compile(rb'<(?:html|head|body)[\s>]', re.IGNORECASE)
+
+# Position of each field within a page's stretch of each array
+SLOTS = {
+    'hashes': {field: slot for slot, field in enumerate(HASHED)},
+    'counts': {tag: slot for slot, tag in enumerate(TAGS)},
+    'lengths': {field: slot for slot, field in enumerate(LENGTHS)}
+}
+
+INDEX_MAGIC = b'META-BOT-AUDIT\n'
+INDEX_VERSION = 1
+INDEX_ARRAYS = ('offsets', 'hashes', 'counts', 'lengths')
+
+def iter_pages(root, exclude=DEFAULT_EXCLUDES):
+    """HTML files under root in a stable order, skipping exclude folders"""
+    for folder, dirs, names in os.walk(root):
+        dirs[:] = sorted(name for name in dirs if name not in exclude and not name.startswith('.'))
+        for name in sorted(names):
+            if name.endswith('.html'):
+                yield os.path.join(folder, name)
+
+def read_head(path):
+    """The page's bytes up to and including </head> (or HEAD_LIMIT)"""
+    data = b''
+    with open(path, 'rb') as f:
+        while len(data) < HEAD_LIMIT:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                break
+            # </head> may straddle two chunks
+            start = max(len(data) - 6, 0)
+            data += chunk
+            head_end = HEAD_END_RE.search(data, start)
+            if head_end:
+                return data[:head_end.end()]
+    return data[:HEAD_LIMIT]
+
+def text_hash(text):
+    """64-bit hash of text with whitespace collapsed, 0 for none"""
+    if text is None:
+        return 0
+    digest = hashlib.blake2b(' '.join(text.split()).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+def read_meta(head):
+    """Existing meta of a page's head as (values, tag counts)"""
+    titles = PATTERNS['title_text'].findall(head)
+    descs = [extract_text_from_meta(tag) for tag in PATTERNS['description'].findall(head)]
+    keywords = [extract_text_from_meta(tag) for tag in PATTERNS['keywords'].findall(head)]
+    canonicals = [PATTERNS['href_attr'].search(tag) for tag in PATTERNS['canonical'].findall(head)]
+    ga_id = PATTERNS['ga_id'].search(head)
+    values = {
+        'title': unescape(titles[0]).strip() if titles else None,
+        'desc': unescape(descs[0]).strip() if descs else None,
+        'keywords': unescape(keywords[0]).strip() if keywords else None,
+        'canonical': canonicals[0].group(1) if canonicals and canonicals[0] else None,
+        'ga_id': ga_id.group(1) if ga_id else None
+    }
+    # Every snippet, stock or the bot's, has one dataLayer script; a
+    # stray second loader counts too
+    snippets = max(len(PATTERNS['ga_snippet'].findall(head)), len(PATTERNS['ga_loader'].findall(head)))
+    counts = {'title': len(titles), 'desc': len(descs), 'keywords': len(keywords), 'canonical': len(canonicals), 'ga': snippets}
+    return values, counts
+
+def new_index(root):
+    """Empty audit index for the site at root"""
+    return {
+        'root': root,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'pages': 0,
+        'strings': bytearray(),
+        'offsets': array('Q', [0]),
+        'hashes': array('Q'),
+        'counts': array('B'),
+        'lengths': array('H')
+    }
+
+def add_page(index, path, values, counts):
+    """Append one page's record to the index"""
+    for field in STRINGS:
+        text = path if field == 'path' else values[field]
+        index['strings'] += (text or '').encode('utf-8')
+        index['offsets'].append(len(index['strings']))
+    index['hashes'].extend(text_hash(values[field]) for field in HASHED)
+    index['counts'].extend(min(counts[tag], 255) for tag in TAGS)
+    index['lengths'].extend(min(len(values[field] or ''), 65535) for field in LENGTHS)
+    index['pages'] += 1
+
+def page_string(index, page, field):
+    """A STRINGS field of a page"""
+    slot = page * len(STRINGS) + STRINGS.index(field)
+    return index['strings'][index['offsets'][slot]:index['offsets'][slot + 1]].decode('utf-8')
+
+def page_value(index, name, page, field):
+    """A HASHED, TAGS or LENGTHS field of a page from the array called name"""
+    slots = SLOTS[name]
+    return index[name][page * len(slots) + slots[field]]
+
+def build_index(root, exclude=DEFAULT_EXCLUDES):
+    """Audit index of every page under root, returns (index, fragments, failed)"""
+    index = new_index(root)
+    fragments = 0
+    failed = []
+    for path in iter_pages(root, exclude):
+        try:
+            data = read_head(path)
+        except OSError as e:
+            failed.append((path, str(e)))
+            continue
+        if PAGE_TAG_RE.search(data) is None:
+            fragments += 1
+            continue
+        values, counts = read_meta(data.decode(page_charset(data), 'replace'))
+        add_page(index, os.path.relpath(path, root).replace(os.sep, '/'), values, counts)
+    return index, fragments, failed
+
+def save_index(index, path):
+    """Write the index: magic, a JSON header line, then the raw arrays"""
+    header = {
+        'version': INDEX_VERSION,
+        'root': index['root'],
+        'created': index['created'],
+        'pages': index['pages'],
+        'byteorder': sys.byteorder,
+        'strings': len(index['strings']),
+        'arrays': {name: len(index[name]) for name in INDEX_ARRAYS}
+    }
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(INDEX_MAGIC)
+        f.write(json.dumps(header).encode('utf-8') + b'\n')
+        f.write(index['strings'])
+        for name in INDEX_ARRAYS:
+            index[name].tofile(f)
+    os.replace(tmp, path)
+
+def load_index(path):
+    """Read an index written by save_index"""
+    with open(path, 'rb') as f:
+        if f.readline() != INDEX_MAGIC:
+            raise ValueError(f"{path} is not an audit index")
+        header = json.loads(f.readline())
+        if header.get('version') != INDEX_VERSION:
+            raise ValueError(f"{path} has index version {header.get('version')}, expected {INDEX_VERSION}")
+        index = new_index(header['root'])
+        index['created'] = header['created']
+        index['pages'] = header['pages']
+        index['strings'] = bytearray(f.read(header['strings']))
+        index['offsets'] = array('Q')
+        for name in INDEX_ARRAYS:
+            index[name].fromfile(f, header['arrays'][name])
+            if header['byteorder'] != sys.byteorder:
+                index[name].byteswap()
+    return index
+
+def duplicates(index, field):
+    """Groups of pages sharing a non-empty field hash, largest first
+    
+    Two passes over the hash array: the first finds hashes seen more
+    than once, the second collects only their pages.
+    """
+    first = {}
+    repeated = set()
+    for page in range(index['pages']):
+        digest = page_value(index, 'hashes', page, field)
+        if digest and first.setdefault(digest, page) != page:
+            repeated.add(digest)
+    del first
+    
+    groups = {}
+    for page in range(index['pages']):
+        digest = page_value(index, 'hashes', page, field)
+        if digest in repeated:
+            groups.setdefault(digest, []).append(page)
+    return sorted(groups.values(), key=len, reverse=True)
+
+# Tags every page should have exactly one of: (tag, missing, repeated)
+REQUIRED_TAGS = (
+    ('title', 'missing title', 'multiple titles'),
+    ('desc', 'missing description', 'multiple descriptions'),
+    ('keywords', 'missing keywords', 'multiple keywords'),
+    ('canonical', 'missing canonical', 'multiple canonicals')
+)
+
+def find_issues(index, title_max=TITLE_MAX, desc_max=DESC_MAX):
+    """Pages per issue, {issue: [page, ...]}"""
+    issues = {}
+    for _, missing, repeated in REQUIRED_TAGS:
+        issues[missing] = []
+        issues[repeated] = []
+    title_long = f'title over {title_max} chars'
+    desc_long = f'description over {desc_max} chars'
+    issues[title_long] = []
+    issues[desc_long] = []
+    issues['multiple GA snippets'] = []
+    
+    for page in range(index['pages']):
+        for tag, missing, repeated in REQUIRED_TAGS:
+            count = page_value(index, 'counts', page, tag)
+            if count == 0:
+                issues[missing].append(page)
+            elif count > 1:
+                issues[repeated].append(page)
+        if page_value(index, 'lengths', page, 'title') > title_max:
+            issues[title_long].append(page)
+        if page_value(index, 'lengths', page, 'desc') > desc_max:
+            issues[desc_long].append(page)
+        if page_value(index, 'counts', page, 'ga') > 1:
+            issues['multiple GA snippets'].append(page)
+    return issues
+
+def diff_indexes(old, new):
+    """Pages added, removed and changed (with the HASHED fields that differ) between two indexes"""
+    before = {page_string(old, page, 'path'): page for page in range(old['pages'])}
+    added = []
+    changed = []
+    for page in range(new['pages']):
+        path = page_string(new, page, 'path')
+        old_page = before.pop(path, None)
+        if old_page is None:
+            added.append(path)
+            continue
+        fields = [field for field in HASHED
+                  if page_value(old, 'hashes', old_page, field) != page_value(new, 'hashes', page, field)]
+        if fields:
+            changed.append((path, fields))
+    return {'added': added, 'removed': sorted(before), 'changed': changed}
+
+def describe_page(index, page, detail=None):
+    """One report line for a page"""
+    line = page_string(index, page, 'path')
+    return f"{line}  ({detail})" if detail else line
+
+def print_report(index, issues, title_groups, desc_groups, limit=REPORT_LIMIT):
+    """Print the audit report"""
+    print("\n" + "="*60)
+    print("🔎 ISSUES")
+    print("="*60)
+    for issue, pages in issues.items():
+        marker = '✅' if not pages else '❌'
+        print(f"{marker} {issue:<32} {len(pages):>7} page(s)")
+        for page in pages[:limit]:
+            detail = None
+            if issue.startswith('title over'):
+                detail = f"{page_value(index, 'lengths', page, 'title')} chars"
+            elif issue.startswith('description over'):
+                detail = f"{page_value(index, 'lengths', page, 'desc')} chars"
+            elif issue == 'multiple GA snippets':
+                detail = f"{page_value(index, 'counts', page, 'ga')} snippets"
+            print(f"      • {describe_page(index, page, detail)}")
+        if len(pages) > limit:
+            print(f"      … and {len(pages) - limit} more")
+    
+    for label, groups in (('titles', title_groups), ('descriptions', desc_groups)):
+        print("\n" + "="*60)
+        pages = sum(len(group) for group in groups)
+        print(f"👯 DUPLICATE {label.upper()}: {len(groups)} group(s), {pages} page(s)")
+        print("="*60)
+        for group in groups[:limit]:
+            first = group[0]
+            if label == 'titles':
+                sample = page_string(index, first, 'title')
+            else:
+                sample = read_sample(index, first)
+            print(f"\n{len(group):>5} × {sample[:70]}")
+            for page in group[:limit]:
+                print(f"      • {page_string(index, page, 'path')}")
+            if len(group) > limit:
+                print(f"      … and {len(group) - limit} more")
+        if len(groups) > limit:
+            print(f"\n… and {len(groups) - limit} more group(s)")
+    
+    ga_ids = {}
+    for page in range(index['pages']):
+        ga_id = page_string(index, page, 'ga_id')
+        if ga_id:
+            ga_ids[ga_id] = ga_ids.get(ga_id, 0) + 1
+    if len(ga_ids) > 1:
+        print("\n" + "="*60)
+        print(f"📊 {len(ga_ids)} different GA ids: " + ', '.join(f"{ga_id} ({count})" for ga_id, count in sorted(ga_ids.items())))
+        print("="*60)
+
+def read_sample(index, page):
+    """Description of a page, read again from disk (the index only has its hash)"""
+    try:
+        data = read_head(os.path.join(index['root'], page_string(index, page, 'path')))
+    except OSError:
+        return '(unreadable)'
+    return read_meta(data.decode(page_charset(data), 'replace'))[0]['desc'] or ''
+
+def print_diff(diff, limit=REPORT_LIMIT):
+    """Print the change list between two runs"""
+    print("\n" + "="*60)
+    print("🔁 CHANGES SINCE THE SAVED INDEX")
+    print("="*60)
+    print(f"➕ {len(diff['added'])} added, ➖ {len(diff['removed'])} removed, ✏️  {len(diff['changed'])} changed")
+    for marker, paths in (('➕', diff['added']), ('➖', diff['removed'])):
+        for path in paths[:limit]:
+            print(f"   {marker} {path}")
+        if len(paths) > limit:
+            print(f"   … and {len(paths) - limit} more")
+    for path, fields in diff['changed'][:limit]:
+        print(f"   ✏️  {path}: {', '.join(fields)}")
+    if len(diff['changed']) > limit:
+        print(f"   … and {len(diff['changed']) - limit} more")
+
+def report_json(index, issues, title_groups, desc_groups, diff):
+    """The audit as a JSON-ready dict"""
+    def paths(pages):
+        return [page_string(index, page, 'path') for page in pages]
+    
+    return {
+        'root': index['root'],
+        'created': index['created'],
+        'pages': index['pages'],
+        'issues': {issue: paths(pages) for issue, pages in issues.items()},
+        'duplicate_titles': [{'title': page_string(index, group[0], 'title'), 'pages': paths(group)} for group in title_groups],
+        'duplicate_descriptions': [paths(group) for group in desc_groups],
+        'diff': diff
+    }
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory', nargs='?', default='.', help="site folder (default: current folder)")
+    parser.add_argument('--exclude', action='append', default=[], metavar='NAME',
+                        help=f"skip folders with this name, repeatable (always skipped: {', '.join(DEFAULT_EXCLUDES)})")
+    parser.add_argument('--title-max', type=int, default=TITLE_MAX, metavar='N',
+                        help=f"flag titles longer than N characters (default: {TITLE_MAX})")
+    parser.add_argument('--desc-max', type=int, default=DESC_MAX, metavar='N',
+                        help=f"flag descriptions longer than N characters (default: {DESC_MAX})")
+    parser.add_argument('--limit', type=int, default=REPORT_LIMIT, metavar='N',
+                        help=f"example pages shown per issue or group (default: {REPORT_LIMIT})")
+    parser.add_argument('--save', metavar='FILE', help="save the index to FILE for a later --diff")
+    parser.add_argument('--diff', metavar='FILE', help="list pages changed since an index saved with --save")
+    parser.add_argument('--out', metavar='FILE', help="also write the report as JSON to FILE")
+    return parser.parse_args(argv)
+
+def main():
+    """Main function"""
+    args = parse_args()
+    root = os.path.abspath(args.directory)
+    
+    print("\n" + "="*60)
+    print("🔎 SEO META TAGS AUDIT")
+    print("="*60)
+    
+    if not os.path.isdir(root):
+        print(f"\n❌ No such folder: {root}")
+        sys.exit(1)
+    
+    previous = None
+    if args.diff:
+        try:
+            previous = load_index(args.diff)
+        except (OSError, ValueError) as e:
+            print(f"\n❌ Cannot load {args.diff}: {e}")
+            sys.exit(1)
+    
+    started = time.perf_counter()
+    index, fragments, failed = build_index(root, DEFAULT_EXCLUDES + tuple(args.exclude))
+    issues = find_issues(index, args.title_max, args.desc_max)
+    title_groups = duplicates(index, 'title')
+    desc_groups = duplicates(index, 'desc')
+    elapsed = time.perf_counter() - started
+    
+    size = len(index['strings']) + sum(index[name].itemsize * len(index[name]) for name in INDEX_ARRAYS)
+    print(f"\n📁 {root}: {index['pages']} page(s), {fragments} fragment(s) skipped in {elapsed:.2f}s"
+          f" (index {size / 1024:.1f} KB)")
+    for path, error in failed:
+        print(f"❌ Error reading {path}: {error}")
+    
+    print_report(index, issues, title_groups, desc_groups, args.limit)
+    
+    diff = None
+    if previous is not None:
+        diff = diff_indexes(previous, index)
+        print_diff(diff, args.limit)
+    
+    if args.save:
+        save_index(index, args.save)
+        print(f"\n💾 Saved index to {args.save}")
+    
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report_json(index, issues, title_groups, desc_groups, diff), f, indent=2, ensure_ascii=False)
+        print(f"💾 Saved report to {args.out}")
+    print()
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Cancelled by user!")
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the SEO Meta Tags Bot rewrite pipeline
+- Builds synthetic site trees from this repo's own pages
+- Runs meta-bot2.py's pipeline for each engine / worker / read mode
+- Reports files/sec, MB/sec, peak RSS and read/meta/rewrite/write time as JSON
+
+Full suite: python3 meta-bot-bench.py --files 10,1000,50000 --page-kb 0,256,1024
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from functools import partial
+from itertools import product
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+REPO_DIR = Path(__file__).resolve().parent
+BOT_PATH = REPO_DIR / 'meta-bot2.py'
+
+# Pages copied into every synthetic product folder
+SAMPLE_PAGES = ('index.html', 'cart.html', 'buynow.html', 'product-detail.html')
+
+# Filler used to grow pages to --page-kb, like inlined product JSON
+FILLER_SOURCE = REPO_DIR / 'js' / 'product.js'
+
+# Meta inputs used for every run (category 2 = fashion store)
+SITE = {
+    'base_title': 'Bench Store – Trendy Affordable Clothing Online',
+    'base_desc': 'Shop latest fashion trends online at Bench Store. Affordable clothing in Pune.',
+    'base_keywords': 'fashion Pune, online clothing, affordable fashion, Bench Store',
+    'shop_name': 'Bench Store',
+    'location': 'Pune',
+    'ga_id': 'G-BENCH0000'
+}
+
+def load_bot():
+    """Import meta-bot2.py (the hyphen rules out a plain import)"""
+    spec = importlib.util.spec_from_file_location('meta_bot2', BOT_PATH)
+    bot = importlib.util.module_from_spec(spec)
+    sys.modules['meta_bot2'] = bot
+    spec.loader.exec_module(bot)
+    return bot
+
+def import_bot():
+    """Worker initializer that loads the bot as meta_bot2
+
+    Jobs pickle process_file by that name; fork workers inherit the
+    module, spawned ones (macOS, Windows) have to load it here.
+    """
+    if 'meta_bot2' not in sys.modules:
+        load_bot()
+
+def parse_list(value, cast=str):
+    """Split a comma separated option"""
+    items = [cast(item.strip()) for item in value.split(',') if item.strip()]
+    return list(dict.fromkeys(items))
+
+def pad_page(html, page_kb, filler):
+    """Grow a page to about page_kb KB with a JSON blob before </body>"""
+    missing = page_kb * 1024 - len(html.encode('utf-8'))
+    if page_kb <= 0 or missing <= 0:
+        return html
+    
+    blob = (filler * (missing // len(filler) + 1))[:missing]
+    block = f'<script type="application/json">{blob}</script>\n'
+    index = html.lower().rfind('</body>')
+    if index == -1:
+        return html + block
+    return html[:index] + block + html[index:]
+
+def build_tree(root, files, page_kb):
+    """Write files pages under root as products/<n>/<sample page>, returns total bytes"""
+    filler = FILLER_SOURCE.read_text(encoding='utf-8').replace('</script>', '')
+    pages = [pad_page((REPO_DIR / name).read_text(encoding='utf-8'), page_kb, filler).encode('utf-8')
+             for name in SAMPLE_PAGES]
+    
+    total = 0
+    for number in range(files):
+        folder = root / 'products' / f"{number // len(SAMPLE_PAGES):06d}"
+        if number % len(SAMPLE_PAGES) == 0:
+            folder.mkdir(parents=True, exist_ok=True)
+        data = pages[number % len(SAMPLE_PAGES)]
+        (folder / SAMPLE_PAGES[number % len(SAMPLE_PAGES)]).write_bytes(data)
+        total += len(data)
+    return total
+
+def peak_rss_mb():
+    """Peak RSS of this process plus its largest worker, in MB"""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux reports KB, macOS bytes
+    if sys.platform == 'darwin':
+        peak //= 1024
+    return round(peak / 1024, 1)
+
+def run_case(case):
+    """Run one configuration over case['root'] in this process"""
+    bot = load_bot()
+    root = case['root']
+    
+    job = partial(bot.process_file, bot.new_options(engine=case['engine'], head_only=case['head_only'], site=SITE))
+    
+    stages = {'read': 0.0, 'meta': 0.0, 'rewrite': 0.0, 'write': 0.0}
+    counts = {'changed': 0, 'skipped': 0, 'failed': 0}
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    
+    executor = bot.make_executor(case['workers'], case['backend'], import_bot)
+    try:
+        tasks = ((f, None) for f in bot.iter_html_files(root, recursive=True))
+        for result in bot.map_files(job, tasks, executor, case['workers'], bot.STREAM_CHUNKSIZE):
+            counts[result['status']] += 1
+            for stage, seconds in result['timings'].items():
+                stages[stage] += seconds
+    finally:
+        if executor:
+            executor.shutdown()
+    
+    wall = time.perf_counter() - started
+    files = sum(counts.values())
+    return {
+        'wall_s': round(wall, 4),
+        'cpu_s': round(time.process_time() - cpu_started, 4),
+        'files_per_s': round(files / wall, 1) if wall else None,
+        'mb_per_s': round(case['bytes'] / 1024 / 1024 / wall, 2) if wall else None,
+        'peak_rss_mb': peak_rss_mb(),
+        'stages_s': {stage: round(seconds, 4) for stage, seconds in stages.items()},
+        'counts': counts
+    }
+
+def run_case_subprocess(case):
+    """Run one case in a fresh interpreter so peak RSS is per case"""
+    output = subprocess.run(
+        [sys.executable, __file__, '--case', json.dumps(case)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+def case_key(result):
+    """Identify a case across benchmark runs"""
+    return (result['files'], result['page_kb'], result['engine'], result['workers'], result['backend'], result['head_only'])
+
+def compare(results, baseline_path):
+    """Print files/sec change against an earlier --out file"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {case_key(result): result for result in json.load(f)['results']}
+    
+    print("\n" + "="*60)
+    print(f"📊 COMPARED TO {baseline_path}")
+    print("="*60)
+    for result in results:
+        old = baseline.get(case_key(result))
+        if not old or not old['files_per_s']:
+            continue
+        ratio = result['files_per_s'] / old['files_per_s']
+        marker = '✅' if ratio >= 0.95 else '❌'
+        print(f"{marker} {describe(result):<55} {ratio:5.2f}x")
+    print("="*60 + "\n")
+
+def describe(result):
+    """One line label for a case"""
+    mode = 'head-only' if result['head_only'] else 'full'
+    size = f"{result['page_kb']}KB" if result['page_kb'] else 'natural'
+    return f"{result['files']} files {size} {result['engine']} {mode} w={result['workers']}/{result['backend']}"
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', default='10,1000', help="site sizes in files (default: 10,1000)")
+    parser.add_argument('--page-kb', default='0', help="page sizes in KB, 0 = pages as they are (default: 0)")
+    parser.add_argument('--engines', default='scan,regex,bytes', help="rewrite engines (default: scan,regex,bytes)")
+    parser.add_argument('--workers', default=f"1,{os.cpu_count() or 1}", help="worker counts (default: 1,<CPUs>)")
+    parser.add_argument('--backend', default='process', help="pool backends (default: process)")
+    parser.add_argument('--modes', default='full,head-only', help="read modes: full, head-only (default: both)")
+    parser.add_argument('--tmp', help="folder for the synthetic sites (default: system temp)")
+    parser.add_argument('--out', help="write results as JSON to this file")
+    parser.add_argument('--compare', metavar='FILE', help="compare files/sec against an earlier --out file")
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main():
+    """Main function"""
+    args = parse_args()
+    
+    # Child process: run a single case and report back
+    if args.case:
+        print(json.dumps(run_case(json.loads(args.case))))
+        return
+    
+    print("\n" + "="*60)
+    print("⏱️  SEO META TAGS BOT BENCHMARK")
+    print("="*60 + "\n")
+    
+    backends = parse_list(args.backend)
+    matrix = product(
+        parse_list(args.files, int),
+        parse_list(args.page_kb, int),
+        parse_list(args.engines),
+        parse_list(args.modes),
+        parse_list(args.workers, int),
+        backends
+    )
+    
+    results = []
+    for files, page_kb, engine, mode, workers, backend in matrix:
+        # A single worker runs in-process, the backend makes no difference
+        if workers == 1 and backend != backends[0]:
+            continue
+        
+        # Fresh tree per case, the bot rewrites it in place
+        root = Path(tempfile.mkdtemp(prefix='meta-bot-bench-', dir=args.tmp))
+        try:
+            case = {
+                'files': files,
+                'page_kb': page_kb,
+                'engine': engine,
+                'workers': workers,
+                'backend': backend,
+                'head_only': mode == 'head-only',
+                'bytes': build_tree(root, files, page_kb),
+                'root': str(root)
+            }
+            case.update(run_case_subprocess(case))
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        
+        del case['root']
+        results.append(case)
+        print(f"✅ {describe(case):<55} {case['files_per_s']:>9} files/s"
+              f" {case['mb_per_s']:>8} MB/s  RSS {case['peak_rss_mb']} MB")
+    
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'results': results
+    }
+    
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Saved results to {args.out}")
+    else:
+        print("\n" + json.dumps(report, indent=2))
+    
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Cancelled by user!")
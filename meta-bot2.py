@@ -2,215 +2,71 @@
 """
 Ultimate SEO Meta Tags Bot
 Auto-generates smart meta tags for all standard pages
+- Interactive: run without arguments and answer the prompts
+- Batch: --manifest sites.json|.yaml|.csv applies many sites in one run
 """
 
+import argparse
+import csv
+import ctypes
+import ctypes.util
+import difflib
+import fnmatch
+import gzip
+import hashlib
+import heapq
+import importlib
+import io
+import json
+import math
+import mmap
 import os
+import pickle
+import posixpath
 import re
+import select
+import stat
+import struct
+import sys
+import tempfile
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from html import unescape
+from itertools import chain, islice
 from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import quote, unquote, urlsplit
 
-# Category templates
-TEMPLATES = {
-    '1': {
-        'name': '🍬 Sweets/Mithai Store',
-        'title': '{name} – Fresh Mithai & Sweets Online',
-        'desc': 'Order fresh sweets, mithai, and desserts online from {name}. Premium quality sweets in {location}. Free delivery on orders over ₹199.',
-        'keywords': 'sweets {location}, mithai online, {name}, gulab jamun, rasgulla, kaju katli, online sweets delivery {location}, fresh sweets'
-    },
-    '2': {
-        'name': '👗 Fashion/Clothing Store',
-        'title': '{name} – Trendy Affordable Clothing Online',
-        'desc': 'Shop latest fashion trends online at {name}. Affordable clothing, accessories & more in {location}. Free delivery over ₹199.',
-        'keywords': 'fashion {location}, online clothing, affordable fashion, {name}, trendy clothes {location}, fashion store'
-    },
-    '3': {
-        'name': '📱 Electronics Store',
-        'title': '{name} – Electronics & Gadgets Online',
-        'desc': 'Buy electronics, mobile accessories, and gadgets online from {name}. Best prices in {location}. Free delivery over ₹199.',
-        'keywords': 'electronics {location}, gadgets online, {name}, mobile accessories, online electronics store {location}'
-    },
-    '4': {
-        'name': '🛒 Grocery Store',
-        'title': '{name} – Online Grocery Delivery',
-        'desc': 'Order fresh groceries, vegetables, and daily essentials online from {name}. Fast delivery in {location}. Free delivery over ₹199.',
-        'keywords': 'grocery {location}, online grocery, {name}, vegetables online, daily essentials {location}, grocery delivery'
-    },
-    '5': {
-        'name': '💍 Jewelry Store',
-        'title': '{name} – Jewelry & Ornaments Online',
-        'desc': 'Shop beautiful jewelry, gold, silver, and artificial ornaments online from {name} in {location}. Free delivery over ₹199.',
-        'keywords': 'jewelry {location}, online jewelry, {name}, gold jewelry, artificial jewelry {location}, ornaments online'
-    },
-    '6': {
-        'name': '🍽️ Restaurant/Cafe',
-        'title': '{name} – Best Restaurant in {location}',
-        'desc': 'Experience delicious food at {name}, the best restaurant in {location}. Dine-in, takeaway, and home delivery available.',
-        'keywords': 'restaurant {location}, {name}, best food {location}, home delivery, dine-in {location}, cafe'
-    },
-    '7': {
-        'name': '🏨 Hotel/Resort',
-        'title': '{name} – Hotel & Resort in {location}',
-        'desc': 'Book your stay at {name}, a premium hotel in {location}. Comfortable rooms, great service, and excellent amenities.',
-        'keywords': 'hotel {location}, {name}, resort {location}, accommodation, rooms {location}, hotel booking'
-    },
-    '8': {
-        'name': '🏥 Hospital/Clinic',
-        'title': '{name} – Multispecialty Hospital in {location}',
-        'desc': '{name} is a leading hospital in {location} offering expert medical care, advanced facilities, and 24/7 emergency services.',
-        'keywords': 'hospital {location}, {name}, medical care {location}, doctors, emergency services {location}, healthcare'
-    },
-    '9': {
-        'name': '👨‍⚕️ Doctor Website',
-        'title': 'Dr. {name} – {location} | Book Appointment Online',
-        'desc': 'Consult Dr. {name}, experienced doctor in {location}. Book appointment online for expert medical consultation and treatment.',
-        'keywords': 'doctor {location}, Dr. {name}, medical consultation {location}, book appointment, specialist {location}'
-    },
-    '10': {
-        'name': '🏫 School/College',
-        'title': '{name} – Best School in {location}',
-        'desc': '{name} provides quality education with experienced teachers in {location}. Admission open for new session.',
-        'keywords': 'school {location}, {name}, education {location}, admission, best school {location}, quality education'
-    },
-    '11': {
-        'name': '📚 Coaching Institute',
-        'title': '{name} – Coaching Classes in {location}',
-        'desc': 'Join {name} for expert coaching in {location}. Experienced faculty, proven results, and comprehensive study material.',
-        'keywords': 'coaching {location}, {name}, classes {location}, tuition, exam preparation {location}, coaching institute'
-    },
-    '12': {
-        'name': '🏠 Real Estate',
-        'title': '{name} – Property Dealer in {location}',
-        'desc': 'Find your dream home with {name}, trusted property dealer in {location}. Residential & commercial properties available.',
-        'keywords': 'property {location}, {name}, real estate {location}, buy property, sell property {location}, homes for sale'
-    },
-    '13': {
-        'name': '⚡ Electrician Service',
-        'title': '{name} – Electrician Services in {location}',
-        'desc': 'Professional electrician services by {name} in {location}. Electrical repair, installation, and maintenance. Call now!',
-        'keywords': 'electrician {location}, {name}, electrical services {location}, wiring, repair {location}, electrical work'
-    },
-    '14': {
-        'name': '🔧 Plumber Service',
-        'title': '{name} – Plumber Services in {location}',
-        'desc': 'Expert plumber services by {name} in {location}. Plumbing repair, installation, and emergency services. Quick response!',
-        'keywords': 'plumber {location}, {name}, plumbing services {location}, pipe repair, emergency plumber {location}'
-    },
-    '15': {
-        'name': '🧹 Cleaning Service',
-        'title': '{name} – Professional Cleaning Services in {location}',
-        'desc': 'Get professional cleaning services from {name} in {location}. Home, office, and deep cleaning solutions.',
-        'keywords': 'cleaning service {location}, {name}, professional cleaning {location}, home cleaning, office cleaning {location}'
-    },
-    '16': {
-        'name': '💻 IT/Web Agency',
-        'title': '{name} – Web Development & IT Services in {location}',
-        'desc': '{name} offers web development, app development, and IT solutions in {location}. Professional digital services for your business.',
-        'keywords': 'web development {location}, {name}, IT services {location}, app development, website design {location}, digital agency'
-    },
-    '17': {
-        'name': '⚖️ Law Firm',
-        'title': '{name} – Law Firm & Legal Services in {location}',
-        'desc': '{name} provides expert legal consultation and services in {location}. Experienced lawyers for all your legal needs.',
-        'keywords': 'lawyer {location}, {name}, legal services {location}, law firm, advocate {location}, legal consultation'
-    },
-    '18': {
-        'name': '💼 CA/Finance Firm',
-        'title': '{name} – Chartered Accountant in {location}',
-        'desc': '{name} offers CA services, tax filing, audit, and financial consultation in {location}. Expert accounting solutions.',
-        'keywords': 'chartered accountant {location}, {name}, CA services {location}, tax filing, audit {location}, GST'
-    },
-    '19': {
-        'name': '👨‍💻 Developer Portfolio',
-        'title': '{name} – Web Developer Portfolio | {location}',
-        'desc': 'Professional web developer {name} from {location}. Specialized in modern web development, React, Node.js, and full-stack solutions.',
-        'keywords': 'web developer {location}, {name}, portfolio, React developer, full-stack developer {location}, freelance developer'
-    },
-    '20': {
-        'name': '🎨 Designer Portfolio',
-        'title': '{name} – UI/UX Designer Portfolio | {location}',
-        'desc': 'Creative UI/UX designer {name} from {location}. Expert in user interface design, user experience, and product design.',
-        'keywords': 'UI UX designer {location}, {name}, portfolio, graphic designer, product designer {location}, freelance designer'
-    }
-}
+from meta_bot_core import (
+    DEFAULT_ENGINE, DEFAULT_EXCLUDES, DEFAULT_GA_MODE, DESC_META_RE, ENGINES, GA_MODES, HEAD_END_RE, KEYWORDS_META_RE,
+    META_FIELDS, TITLE_TAG_RE, apply_template, category_templates, compile_template, escape_html, extract_text_from_meta,
+    generate_page_meta, page_charset, page_templates, phase_done, render_template, site_brand, update_meta_tags
+)
 
-def generate_page_meta(page_name, base_title, base_desc, base_keywords, shop_name, location):
-    """Generate smart meta tags for specific pages"""
-    
-    # Extract shop name from base title (remove everything after –)
-    if '–' in base_title:
-        brand = base_title.split('–')[0].strip()
-    else:
-        brand = shop_name
-    
-    page_metas = {
-        'about.html': {
-            'title': f'About Us – {brand}',
-            'desc': f'Learn about {brand} in {location}. Our story, mission, and commitment to providing the best products and services.',
-            'keywords': f'about {brand}, {location}, our story, company information, {base_keywords.split(",")[0]}'
-        },
-        'contact.html': {
-            'title': f'Contact Us – {brand} | {location}',
-            'desc': f'Contact {brand} in {location}. Get in touch for inquiries, support, or visit our store. We\'re here to help!',
-            'keywords': f'contact {brand}, {location}, phone, email, address, customer support'
-        },
-        'services.html': {
-            'title': f'Our Services – {brand}',
-            'desc': f'Explore services offered by {brand} in {location}. Quality services tailored to your needs.',
-            'keywords': f'services {location}, {brand}, offerings, solutions, {base_keywords.split(",")[0]}'
-        },
-        'product-detail.html': {
-            'title': f'Product Details – {brand}',
-            'desc': f'View detailed product information at {brand}. Quality products in {location} with fast delivery.',
-            'keywords': f'products {location}, {brand}, buy online, product details, {base_keywords.split(",")[0]}'
-        },
-        'cart.html': {
-            'title': f'Shopping Cart – {brand}',
-            'desc': f'Review your shopping cart at {brand}. Secure checkout and fast delivery in {location}.',
-            'keywords': f'shopping cart, checkout, {brand}, buy online {location}'
-        },
-        'buynow.html': {
-            'title': f'Checkout – {brand}',
-            'desc': f'Complete your purchase at {brand}. Safe and secure checkout with multiple payment options.',
-            'keywords': f'checkout, buy now, {brand}, secure payment, online shopping {location}'
-        },
-        'yourorders.html': {
-            'title': f'Your Orders – {brand}',
-            'desc': f'Track and view your orders from {brand}. Order history and delivery status.',
-            'keywords': f'my orders, order history, {brand}, track order {location}'
-        },
-        'privacy.html': {
-            'title': f'Privacy Policy – {brand}',
-            'desc': f'Read the privacy policy of {brand}. How we protect and handle your personal information.',
-            'keywords': f'privacy policy, {brand}, data protection, privacy {location}'
-        },
-        'terms.html': {
-            'title': f'Terms & Conditions – {brand}',
-            'desc': f'Terms and conditions for using {brand} services. Please read before making a purchase.',
-            'keywords': f'terms conditions, {brand}, legal, terms of service {location}'
-        },
-        'shipping.html': {
-            'title': f'Shipping Policy – {brand}',
-            'desc': f'Shipping and delivery information for {brand}. Delivery times, charges, and areas covered in {location}.',
-            'keywords': f'shipping policy, delivery, {brand}, shipping charges {location}'
-        },
-        'return.html': {
-            'title': f'Return & Refund Policy – {brand}',
-            'desc': f'Return and refund policy for {brand}. Easy returns and hassle-free refunds in {location}.',
-            'keywords': f'return policy, refund, {brand}, easy returns {location}'
-        }
-    }
-    
-    return page_metas.get(page_name, {
-        'title': base_title,
-        'desc': base_desc,
-        'keywords': base_keywords
-    })
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Optional dependencies (PyYAML, brotli, Pillow, NumPy) are imported on
+# first use, so runs and worker processes that don't need them don't
+# pay for the import
+@lru_cache(maxsize=None)
+def optional_module(name):
+    """Import an optional dependency, None if it isn't installed"""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
 
 def show_categories():
     """Display all available categories"""
     print("\n" + "="*60)
     print("📋 AVAILABLE CATEGORIES")
     print("="*60)
-    for key, template in TEMPLATES.items():
+    for key, template in category_templates().items():
         print(f"{key:>3}. {template['name']}")
     print("="*60 + "\n")
 
@@ -232,136 +88,3231 @@ def yes_no(prompt):
             return False
         print("❌ Please answer 'yes' or 'no'")
 
-def extract_text_from_meta(text):
-    """Extract content from meta tag if provided as full HTML"""
-    # If user provided full <title>...</title>, extract content
-    title_match = re.search(r'<title>(.*?)</title>', text, re.IGNORECASE)
-    if title_match:
-        return title_match.group(1)
-    
-    # If user provided <meta name="..." content="...">, extract content
-    content_match = re.search(r'content=["\']([^"\']*)["\']', text)
-    if content_match:
-        return content_match.group(1)
-    
-    # Otherwise return as-is
-    return text
-
-def update_meta_tags(html_content, title, desc, keywords, ga_id=None):
-    """Update meta tags in HTML content"""
-    
-    # Escape special characters for HTML
-    def escape_html(text):
-        return (text.replace('&', '&amp;')
-                    .replace('<', '&lt;')
-                    .replace('>', '&gt;')
-                    .replace('"', '&quot;')
-                    .replace("'", '&#39;'))
-    
-    safe_desc = escape_html(desc)
-    safe_keywords = escape_html(keywords)
-    
-    # Remove existing title
-    html_content = re.sub(r'<title>.*?</title>', f'<title>{title}</title>', html_content, flags=re.IGNORECASE)
-    
-    # Remove existing description
-    html_content = re.sub(r'<meta\s+name=["\']description["\']\s+content=["\'][^"\']*["\']\s*/?>', '', html_content, flags=re.IGNORECASE)
-    
-    # Remove existing keywords
-    html_content = re.sub(r'<meta\s+name=["\']keywords["\']\s+content=["\'][^"\']*["\']\s*/?>', '', html_content, flags=re.IGNORECASE)
-    
-    # Remove existing Google Analytics
-    html_content = re.sub(r'<!--\s*Google tag.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-    html_content = re.sub(r'<script[^>]*googletagmanager[^>]*>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-    html_content = re.sub(r'<script[^>]*gtag[^>]*>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-    
-    # Find </title> and insert new meta tags
-    title_match = re.search(r'</title>', html_content, re.IGNORECASE)
-    if title_match:
-        insert_point = title_match.end()
-        new_meta = f'\n  <meta name="description" content="{safe_desc}">'
-        new_meta += f'\n  <meta name="keywords" content="{safe_keywords}">'
-        
-        if ga_id:
-            new_meta += '\n\n  <!-- Google Analytics -->'
-            new_meta += f'\n  <script async src="https://www.googletagmanager.com/gtag/js?id={ga_id}"></script>'
-            new_meta += '\n  <script>'
-            new_meta += '\n    window.dataLayer = window.dataLayer || [];'
-            new_meta += '\n    function gtag(){dataLayer.push(arguments);}'
-            new_meta += "\n    gtag('js', new Date());"
-            new_meta += f"\n    gtag('config', '{ga_id}');"
-            new_meta += '\n  </script>'
-        
-        html_content = html_content[:insert_point] + new_meta + html_content[insert_point:]
-    
-    return html_content
-
-def process_html_files(directory, base_title, base_desc, base_keywords, shop_name, location, ga_id=None):
-    """Process all HTML files in directory"""
-    html_files = list(Path(directory).glob('*.html'))
-    
-    if not html_files:
-        print("\n❌ No HTML files found in current directory!")
+# Pool backends for --workers: processes for the CPU-bound rewrite,
+# threads when the files sit on slow/network storage
+BACKENDS = ('process', 'thread')
+DEFAULT_BACKEND = 'process'
+
+def resolve_workers(workers):
+    """Turn --workers into a pool size (0 means one per CPU)"""
+    if workers == 0:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+def make_executor(workers, backend=DEFAULT_BACKEND, initializer=None):
+    """Create a worker pool, or None to run in-process
+
+    initializer runs first in each worker process (see meta-bot-bench.py).
+    """
+    workers = resolve_workers(workers)
+    if workers == 1:
+        return None
+    if backend == 'thread':
+        return ThreadPoolExecutor(max_workers=workers)
+    return ProcessPoolExecutor(max_workers=workers, initializer=initializer)
+
+def run_chunk(job, chunk):
+    """Run job over a chunk of argument tuples inside one worker"""
+    return [job(*args) for args in chunk]
+
+# Process pools: a job carrying run data (a partial over the options
+# with fragments, hint policy, srcset variants, image sizes) is pickled
+# once per map_files call into a temp file that each worker loads on
+# first use, so chunks only carry their tasks. Pools are shared across
+# sites and watch runs, so this can't go through the pool initializer
+@lru_cache(maxsize=4)
+def load_job(path, digest):
+    """Job left in path by map_files, read once per worker (digest tells runs apart)"""
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def run_shipped_chunk(path, digest, chunk):
+    """run_chunk for a job left in a file by map_files"""
+    return run_chunk(load_job(path, digest), chunk)
+
+def map_files(job, tasks, executor=None, workers=1, chunksize=1):
+    """Run job(*task) for each task, yielding results in input order
+
+    tasks may be a lazy iterator: only a few chunks per worker are in
+    flight at a time, so work starts while tasks are still being found.
+    """
+    if executor is None:
+        for task in tasks:
+            yield job(*task)
         return
     
-    print(f"\n📁 Found {len(html_files)} HTML file(s):\n")
-    for f in html_files:
-        print(f"   • {f.name}")
+    shipped = None
+    if isinstance(executor, ProcessPoolExecutor) and isinstance(job, partial):
+        data = pickle.dumps(job, pickle.HIGHEST_PROTOCOL)
+        fd, path = tempfile.mkstemp(prefix='meta-bot-job-', suffix='.pickle')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        shipped = (path, content_hash(data))
     
-    print("\n" + "="*60)
+    tasks = iter(tasks)
+    limit = resolve_workers(workers) * 4
+    pending = deque()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < limit:
+                chunk = list(islice(tasks, chunksize))
+                if not chunk:
+                    exhausted = True
+                    break
+                if shipped:
+                    pending.append(executor.submit(run_shipped_chunk, *shipped, chunk))
+                else:
+                    pending.append(executor.submit(run_chunk, job, chunk))
+            
+            if not pending:
+                break
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if shipped:
+            os.remove(shipped[0])
+
+# File discovery: --include/--exclude globs match an entry's name or its
+# path relative to the site root
+DEFAULT_INCLUDES = ('*.html',)
+
+# Chunk size when the number of files isn't known up front
+STREAM_CHUNKSIZE = 8
+
+def compile_globs(patterns):
+    """Compile glob patterns into one regex"""
+    patterns = [pattern.rstrip('/') for pattern in patterns]
+    return re.compile('|'.join(fnmatch.translate(pattern) for pattern in patterns)) if patterns else None
+
+def iter_html_files(directory, recursive=False, include=DEFAULT_INCLUDES, exclude=DEFAULT_EXCLUDES):
+    """Yield matching files under directory, lazily and in sorted order"""
+    include_re = compile_globs(include)
+    exclude_re = compile_globs(exclude)
+    root = os.path.abspath(directory)
     
-    if not yes_no("Update all these files? (yes/no): "):
-        print("\n❌ Cancelled!")
-        return
+    def matches(pattern, entry, rel_path):
+        return pattern is not None and (pattern.match(entry.name) or pattern.match(rel_path))
     
-    print("\n🚀 Processing files...\n")
+    # Depth-first walk; each directory is read with one scandir call
+    stack = [(root, '')]
+    while stack:
+        path, rel_dir = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            print(f"❌ Cannot read {path}: {e.strerror}")
+            continue
+        
+        subdirs = []
+        for entry in entries:
+            # Hidden files and folders are skipped, like glob('*.html')
+            if entry.name.startswith('.'):
+                continue
+            rel_path = f"{rel_dir}{entry.name}"
+            if matches(exclude_re, entry, rel_path):
+                continue
+            if entry.is_dir():
+                if recursive:
+                    subdirs.append((entry.path, f"{rel_path}/"))
+            elif matches(include_re, entry, rel_path) and entry.is_file():
+                yield Path(entry.path)
+        
+        # Push in reverse so subfolders come out in name order
+        stack.extend(reversed(subdirs))
+
+# Bump when the injected markup changes so old state can't skip files
+STATE_VERSION = 3
+
+def new_hasher():
+    """Hash object used for content hashes"""
+    return hashlib.blake2b(digest_size=16)
+
+def content_hash(data):
+    """Short hash of file bytes"""
+    hasher = new_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+def meta_hash(page_meta, ga_id, engine, *options):
+    """Hash of everything besides the file that decides the output"""
+    key = json.dumps([page_meta['title'], page_meta['desc'], page_meta['keywords'], ga_id, engine, *options])
+    return content_hash(key.encode('utf-8'))
+
+def page_lastmod(previous, new_hash, mtime):
+    """Date a page's content last changed; kept while its hash stays the same"""
+    if previous and previous.get('hash') == new_hash and previous.get('lastmod'):
+        return previous['lastmod']
+    return time.strftime('%Y-%m-%d', time.gmtime(mtime))
+
+def load_state(path):
+    """Load per-file hashes from a previous run"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return {}
     
-    updated = 0
-    for html_file in html_files:
+    # Outputs from another bot version may differ, start over
+    if state.get('version') != STATE_VERSION:
+        return {}
+    return state.get('files', {})
+
+def save_state(path, files):
+    """Save per-file hashes for the next run"""
+    data = json.dumps({'version': STATE_VERSION, 'files': files}, indent=1, sort_keys=True)
+    write_file_atomic(path, data.encode('utf-8'), fsync=True)
+
+# --fsync: 'none' leaves flushing to the OS, 'dir' fsyncs each touched
+# folder once at the end of the run, 'file' also fsyncs every file
+# before it is renamed into place
+FSYNC_MODES = ('none', 'file', 'dir')
+DEFAULT_FSYNC = 'none'
+
+# Read once at import; os.umask can only be read by setting it
+UMASK = os.umask(0)
+os.umask(UMASK)
+NEW_FILE_MODE = 0o666 & ~UMASK
+
+def write_file_atomic(path, data, fsync=False):
+    """Write data to a temp file next to path, then rename it over path
+
+    data is bytes or an iterable of byte chunks. Readers (and a crash
+    or Ctrl-C) see either the old or the new file, never a half-written
+    one.
+    """
+    commit_temp_file(write_temp_file(path, data, fsync), path)
+
+def write_temp_file(path, data, fsync=False):
+    """First half of write_file_atomic: data in a temp file next to path, returns its path
+
+    Callers streaming from path itself close it before commit_temp_file
+    (Windows can't replace an open or mapped file).
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if isinstance(data, bytes):
+                f.write(data)
+            else:
+                for chunk in data:
+                    f.write(chunk)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        
+        # mkstemp creates 0600 files, keep the original permissions
+        # (new files get the usual umask ones)
         try:
-            # Read file
-            with open(html_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            os.chmod(tmp_path, NEW_FILE_MODE)
+    except BaseException:
+        discard_temp_file(tmp_path)
+        raise
+    return tmp_path
+
+def commit_temp_file(tmp_path, path):
+    """Second half of write_file_atomic: rename the temp file over path"""
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        discard_temp_file(tmp_path)
+        raise
+
+def discard_temp_file(tmp_path):
+    """Remove a temp file from write_temp_file, if still there"""
+    try:
+        os.unlink(tmp_path)
+    except OSError:
+        pass
+
+def fsync_dirs(directories):
+    """fsync folders so renames inside them are on disk"""
+    for directory in sorted(directories):
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            # Not supported on this platform (e.g. Windows)
+            continue
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+# --head-only: only the bytes up to </head> are decoded and rewritten,
+# the body is copied across in chunks. Pages at least MMAP_THRESHOLD
+# bytes are mapped instead of read so they never sit in the heap.
+MMAP_THRESHOLD = 256 * 1024
+COPY_CHUNK = 1024 * 1024
+
+def read_page(f, head_only=False):
+    """Whole page as bytes, or an mmap for large pages in head-only mode"""
+    if head_only and os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return f.read()
+
+def iter_body(f, start, hasher):
+    """Stream the page from start in chunks, feeding hasher on the way"""
+    f.seek(start)
+    while True:
+        chunk = f.read(COPY_CHUNK)
+        if not chunk:
+            break
+        hasher.update(chunk)
+        yield chunk
+
+# --dry-run: unified diffs of the <head> only, or a JSON change list
+DIFF_FORMATS = ('unified', 'json')
+DIFF_CONTEXT = 3
+HUNK_HEADER_RE = re.compile(r'^@@ -(\d+)(,\d+)? \+(\d+)(,\d+)? @@')
+
+def head_region(data):
+    """The bytes up to and including </head>, decoded for display"""
+    head_end = HEAD_END_RE.search(data)
+    if head_end:
+        data = data[:head_end.end()]
+    return data.decode('utf-8', errors='replace')
+
+def head_diff(old, new, name, context=DIFF_CONTEXT):
+    """Unified diff of two heads as a list of lines
+
+    Unchanged lines at both ends are cut off before difflib sees them,
+    so the cost follows the size of the change, not of the head.
+    """
+    a = old.splitlines(keepends=True)
+    b = new.splitlines(keepends=True)
+    
+    limit = min(len(a), len(b))
+    start = 0
+    while start < limit and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < limit - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    
+    low = max(0, start - context)
+    keep = end - min(context, end)
+    
+    def shift(line):
+        match = HUNK_HEADER_RE.match(line)
+        if not match:
+            return line
+        old_start = int(match.group(1)) + low
+        new_start = int(match.group(3)) + low
+        return f"@@ -{old_start}{match.group(2) or ''} +{new_start}{match.group(4) or ''} @@\n"
+    
+    diff = difflib.unified_diff(a[low:len(a) - keep], b[low:len(b) - keep], f"a/{name}", f"b/{name}", n=context)
+    return [shift(line) if line.startswith('@@') else line if line.endswith('\n') else line + '\n' for line in diff]
+
+def write_diffs(changes, diff_format, out=None):
+    """Write dry-run changes as unified diffs or JSON"""
+    f = open(out, 'w', encoding='utf-8') if out else sys.stdout
+    try:
+        if diff_format == 'json':
+            json.dump({'changes': changes}, f, indent=1, ensure_ascii=False)
+            f.write('\n')
+            return
+        
+        for change in changes:
+            f.write(change['diff'])
+    finally:
+        if out:
+            f.close()
+
+# Resource hints: preconnect/preload/defer added to <head> as told by a
+# per-site policy file, e.g.
+#   {"preconnect": "auto", "preload": ["css/style.css"],
+#    "defer": ["js/search.js"], "sizes": {"https://cdn.example/x.css": 90000}}
+# Only scripts the policy names are deferred; the bot can't tell which
+# inline code depends on them
+HINT_POLICY_FIELDS = ('preconnect', 'preload', 'defer', 'sizes')
+HEAD_RESOURCE_RE = re.compile(r'<!--.*?-->|<link\b([^>]*)>|<script\b([^>]*)>', re.DOTALL | re.IGNORECASE)
+HEAD_CLOSE_RE = re.compile(r'</head>', re.IGNORECASE)
+TAG_ATTR_RE = re.compile(r'''([\w:-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?''')
+
+def load_hints_policy(path, directory):
+    """Load a resource hint policy (JSON or YAML) for the site in directory"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if Path(path).suffix.lower() in ('.yaml', '.yml'):
+            yaml = optional_module('yaml')
+            if yaml is None:
+                raise RuntimeError("YAML policies need PyYAML (pip install pyyaml)")
+            policy = yaml.safe_load(f) or {}
+        else:
+            policy = json.load(f)
+    
+    if not isinstance(policy, dict):
+        raise ValueError(f"Hint policy {path} must be a mapping")
+    unknown = sorted(set(policy) - set(HINT_POLICY_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown hint policy field(s) in {path}: {', '.join(unknown)}")
+    
+    preconnect = policy.get('preconnect', 'auto')
+    return {
+        'root': os.path.abspath(directory),
+        'preconnect': preconnect if preconnect == 'auto' else tuple(origin.rstrip('/') for origin in preconnect),
+        'preload': compile_globs(policy.get('preload', ())),
+        'defer': compile_globs(policy.get('defer', ())),
+        'sizes': {str(url): int(size) for url, size in (policy.get('sizes') or {}).items()},
+        'hash': content_hash(json.dumps(policy, sort_keys=True).encode('utf-8'))
+    }
+
+def tag_attrs(text):
+    """Attributes of a tag as a dict, lowercase names"""
+    return {match.group(1).lower(): next((value for value in match.group(2, 3, 4) if value is not None), '')
+            for match in TAG_ATTR_RE.finditer(text)}
+
+def url_origin(url):
+    """scheme://host of a third-party URL, None for local paths"""
+    if url.startswith('//'):
+        url = 'https:' + url
+    parts = urlsplit(url)
+    if parts.scheme in ('http', 'https') and parts.netloc:
+        return f"{parts.scheme}://{parts.netloc}"
+    return None
+
+def local_resource(url, page_path, root):
+    """Site-relative path of a local resource URL"""
+    path = urlsplit(url).path
+    if path.startswith('/'):
+        return path.lstrip('/')
+    return os.path.relpath(os.path.normpath(os.path.join(os.path.dirname(page_path), path)), root).replace(os.sep, '/')
+
+@lru_cache(maxsize=1024)
+def resource_size(path):
+    """Size of a local file, 0 if missing"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def head_resources(head, page_path, root):
+    """Stylesheets and scripts in a head, each {'kind', 'url', 'local', 'attrs', 'start', 'end'}"""
+    resources = []
+    for match in HEAD_RESOURCE_RE.finditer(head):
+        if match.group(0).startswith('<!--'):
+            continue
+        kind = 'link' if match.group(1) is not None else 'script'
+        attrs = tag_attrs(match.group(1) if kind == 'link' else match.group(2))
+        url = attrs.get('href' if kind == 'link' else 'src')
+        if not url or url.startswith('data:'):
+            continue
+        local = None if url_origin(url) else local_resource(url, page_path, root)
+        resources.append({'kind': kind, 'url': url, 'local': local, 'attrs': attrs, 'start': match.start(), 'end': match.end()})
+    return resources
+
+def is_blocking(resource):
+    """Does the browser hold rendering for this resource"""
+    attrs = resource['attrs']
+    if resource['kind'] == 'link':
+        return attrs.get('rel', '').lower() == 'stylesheet' and attrs.get('media', 'all').lower() != 'print'
+    return not ({'async', 'defer'} & set(attrs)) and attrs.get('type', '').lower() != 'module'
+
+def blocking_bytes(resources, policy):
+    """Estimated render-blocking bytes and the number of unknown sizes"""
+    total = unknown = 0
+    for resource in resources:
+        if not is_blocking(resource):
+            continue
+        if resource['local'] is not None:
+            total += resource_size(os.path.join(policy['root'], resource['local']))
+        elif resource['url'] in policy['sizes']:
+            total += policy['sizes'][resource['url']]
+        else:
+            unknown += 1
+    return total, unknown
+
+def optimize_head(html, page_path, policy):
+    """Add preconnect/preload hints and defer scripts in html's head, returns (html, report)
+
+    report holds the estimated blocking bytes before and after.
+    """
+    head_end = HEAD_CLOSE_RE.search(html)
+    head = html[:head_end.start()] if head_end else html
+    resources = head_resources(head, page_path, policy['root'])
+    before, unknown = blocking_bytes(resources, policy)
+    
+    hinted = {(resource['attrs'].get('rel', '').lower(), resource['url'].rstrip('/'))
+              for resource in resources if resource['kind'] == 'link'}
+    
+    # Scripts the policy marks as safe to defer
+    edits = []
+    for resource in resources:
+        pattern = policy['defer']
+        if resource['kind'] == 'script' and pattern and is_blocking(resource) and (
+                pattern.match(resource['url']) or (resource['local'] and pattern.match(resource['local']))):
+            edits.append(resource['end'] - 1)
+            resource['attrs']['defer'] = ''
+    
+    hints = []
+    if policy['preconnect'] == 'auto':
+        origins = [url_origin(resource['url']) for resource in resources
+                   if resource['local'] is None and (resource['kind'] == 'script' or is_blocking(resource))]
+    else:
+        origins = list(policy['preconnect'])
+    for origin in dict.fromkeys(origins):
+        if ('preconnect', origin) not in hinted:
+            hints.append(f'<link rel="preconnect" href="{escape_html(origin)}">')
+    
+    pattern = policy['preload']
+    for resource in resources:
+        if pattern and resource['local'] and is_blocking(resource) and resource['kind'] == 'link' \
+                and pattern.match(resource['local']) and ('preload', resource['url']) not in hinted:
+            hints.append(f'<link rel="preload" href="{escape_html(resource["url"])}" as="style">')
+            hinted.add(('preload', resource['url']))
+    
+    after, _ = blocking_bytes(resources, policy)
+    report = {'before': before, 'after': after, 'unknown': unknown, 'added': len(hints) + len(edits)}
+    if not hints and not edits:
+        return html, report
+    
+    # Hints go on their own lines in front of the first stylesheet/script
+    # so the connections start early
+    first = resources[0]['start'] if resources else len(head)
+    line_start = head.rfind('\n', 0, first) + 1
+    indent = head[line_start:first]
+    if indent.strip():
+        line_start, indent = first, ''
+    inserts = [(position, ' defer') for position in edits]
+    if hints:
+        inserts.append((line_start, ''.join(f"{indent}{hint}\n" for hint in hints)))
+    
+    parts = []
+    last = 0
+    for position, text in sorted(inserts):
+        parts.append(html[last:position])
+        parts.append(text)
+        last = position
+    parts.append(html[last:])
+    return ''.join(parts), report
+
+# Fragments: partial pages such as navbar.html that other pages fetch()
+# into a placeholder element at runtime. They are never rewritten, and
+# with --inline-fragments their markup is copied into the placeholder
+PAGE_TAG_RE = re.compile(rb'<(?:html|head|body)[\s>]', re.IGNORECASE)
+INLINE_SCRIPT_RE = re.compile(r'<script\b[^>]*>(.*?)</script>', re.DOTALL | re.IGNORECASE)
+FRAGMENT_FETCH_RE = re.compile(r'''fetch\(\s*['"`](?:\./|/)?([\w./-]+\.html)['"`]''')
+FRAGMENT_TARGET_RE = re.compile(r'''getElementById\(\s*['"]([\w-]+)['"]\s*\)\s*\.innerHTML\s*=''')
+FRAGMENT_ATTR_RE = re.compile(r'\s+data-fragment="[^"]*"')
+FRAGMENT_SHIM_RE = re.compile(r'[ \t]*<script data-fragment-shim>.*?</script>\n?', re.DOTALL)
+# Serves fetch('navbar.html') from the inlined copy; pages that were
+# not inlined (or a fragment missing from the page) still hit the network
+FRAGMENT_SHIM = (
+    "  <script data-fragment-shim>(function () { var load = window.fetch;"
+    " window.fetch = function (url) { var name = String(url).replace(/^\\.?\\//, ''),"
+    " el = /^[\\w.\\/-]+\\.html$/.test(name) && document.querySelector('[data-fragment=\"' + name + '\"]');"
+    " return el ? Promise.resolve(new Response(el.innerHTML, { headers: { 'Content-Type': 'text/html' } }))"
+    " : load.apply(window, arguments); }; })();</script>\n"
+)
+
+def is_fragment(data):
+    """True for HTML bytes without <html>, <head> or <body>"""
+    return PAGE_TAG_RE.search(data) is None
+
+def load_fragments(directory):
+    """Fragment files in the site root as {name: {'hash', 'html'}}"""
+    fragments = {}
+    for path in iter_html_files(directory):
+        data = path.read_bytes()
+        if is_fragment(data):
+            fragments[path.name] = {'hash': content_hash(data), 'html': data.decode('utf-8').strip()}
+    return fragments
+
+@lru_cache(maxsize=64)
+def fragment_slot_re(element_id, name):
+    """Placeholder element, empty or holding an earlier inlined copy"""
+    return re.compile(
+        rf'''<(\w+)([^>]*\bid=["']{re.escape(element_id)}["'][^>]*)>(?:.*?<!-- /fragment {re.escape(name)} -->)?\s*</\1>''',
+        re.DOTALL
+    )
+
+def find_fragment_slots(html, fragments):
+    """(element id, fragment name) pairs the page's inline scripts fetch"""
+    slots = []
+    for script in INLINE_SCRIPT_RE.finditer(html):
+        names = [name for name in FRAGMENT_FETCH_RE.findall(script.group(1)) if name in fragments]
+        targets = FRAGMENT_TARGET_RE.findall(script.group(1))
+        # One fetch feeding one element; anything cleverer is left alone
+        if len(names) == 1 and targets and (targets[0], names[0]) not in slots:
+            slots.append((targets[0], names[0]))
+    return slots
+
+def inline_fragments(html, fragments):
+    """Copy fetched fragments into their placeholders, returns (html, {name: hash})
+
+    Re-running replaces the earlier copy, so a page only changes when a
+    fragment it uses does.
+    """
+    used = {}
+    for element_id, name in find_fragment_slots(html, fragments):
+        fragment = fragments[name]
+        
+        def fill(match):
+            attrs = FRAGMENT_ATTR_RE.sub('', match.group(2))
+            return (f'<{match.group(1)}{attrs} data-fragment="{name}">\n{fragment["html"]}\n'
+                    f'<!-- /fragment {name} --></{match.group(1)}>')
+        
+        html, found = fragment_slot_re(element_id, name).subn(fill, html, count=1)
+        if found:
+            used[name] = fragment['hash']
+    
+    html = FRAGMENT_SHIM_RE.sub('', html)
+    if used:
+        head_end = HEAD_CLOSE_RE.search(html)
+        if head_end:
+            html = html[:head_end.start()] + FRAGMENT_SHIM + html[head_end.start():]
+    return html, used
+
+# --minify: comments and redundant whitespace stripped from pages and
+# their inline CSS/JS. Raw text in <pre>/<textarea> is left alone and
+# line breaks in scripts are kept, so automatic semicolons still apply
+MINIFY_VERSION = 1
+MINIFY_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'meta-bot', 'minify')
+MINIFY_TOKEN_RE = re.compile(
+    r'(<!--.*?-->)|(<(pre|textarea|script|style)\b([^>]*)>)(.*?)(</\3\s*>)|(<[^>]*>)|([^<]+|<)',
+    re.DOTALL | re.IGNORECASE
+)
+# Comments that mean something: IE conditionals and the bot's own markers
+KEEP_COMMENT_RE = re.compile(r'<!--(?:\[if|\s*/fragment |\s*Google (?:Analytics|tag))', re.IGNORECASE)
+WHITESPACE_RE = re.compile(r'\s+')
+SCRIPT_TYPE_RE = re.compile(r'''\btype\s*=\s*["']?([^"'\s>]+)''', re.IGNORECASE)
+JS_TYPES = ('', 'text/javascript', 'application/javascript', 'module')
+JSON_TYPES = ('application/json', 'application/ld+json')
+CSS_TOKEN_RE = re.compile(r'''("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')|(/\*.*?\*/)|(\s+)|([^"'/\s]+|.)''', re.DOTALL)
+JS_TOKEN_RE = re.compile(r'\n|[^\S\n]+|[\w$]+|.', re.DOTALL)
+JS_FLAGS_RE = re.compile(r'[a-z]*')
+# A / after one of these starts a regex literal, not a division
+JS_REGEX_AFTER = set('(,=:[!&|?{};+-*%<>~^')
+JS_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void', 'throw', 'instanceof', 'yield', 'await'}
+# Spaces next to these can go without joining two tokens into one
+JS_TIGHT = set('{}()[];,:=?&|')
+
+def collapse_whitespace(match):
+    """One newline or one space for a run of whitespace"""
+    return '\n' if '\n' in match.group() else ' '
+
+def minify_css(css):
+    """Drop comments and whitespace CSS doesn't need"""
+    out = []
+    space = False
+    for match in CSS_TOKEN_RE.finditer(css):
+        string, comment, blank, text = match.groups()
+        if comment is not None or blank is not None:
+            space = True
+            continue
+        if text in ('"', "'") or (text == '/' and css.startswith('/*', match.start())):
+            return css  # unterminated string or comment
+        
+        token = string if string is not None else text.replace(';}', '}')
+        if out:
+            prev = out[-1][-1]
+            if token[0] == '}' and prev == ';':
+                out[-1] = out[-1][:-1]
+            elif space and prev not in '{};,:>(' and token[0] not in '{};,>)':
+                out.append(' ')
+        out.append(token)
+        space = False
+    return ''.join(out).strip()
+
+def js_template_end(code, start):
+    """Index after the template literal starting at code[start], -1 if unsure"""
+    i = start + 1
+    while i < len(code):
+        c = code[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '`':
+            return i + 1
+        if code.startswith('${', i):
+            # Nested templates in ${...} are beyond this scanner
+            end = code.find('}', i)
+            if end < 0 or '`' in code[i:end] or '{' in code[i + 2:end]:
+                return -1
+            i = end
+        i += 1
+    return -1
+
+def js_literal_end(code, start, quote):
+    """Index after the string or regex literal at code[start], -1 if unterminated"""
+    i = start + 1
+    in_class = False
+    while i < len(code):
+        c = code[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '\n':
+            return -1
+        if quote == '/' and c in '[]':
+            in_class = c == '['
+        elif c == quote and not in_class:
+            return i + 1
+        i += 1
+    return -1
+
+def minify_js(code):
+    """Drop comments and indentation from a script, or return it as is if unsure"""
+    out = []
+    prev = ''  # last token written
+    pending = ''  # whitespace seen since: '', ' ' or a line break
+    pos = 0
+    while pos < len(code):
+        c = code[pos]
+        if code.startswith('//', pos):
+            end = code.find('\n', pos)
+            pos = len(code) if end < 0 else end
+            continue
+        if code.startswith('/*', pos):
+            end = code.find('*/', pos + 2)
+            if end < 0:
+                return code
+            if '\n' in code[pos:end]:
+                pending = '\n'
+            pending = pending or ' '
+            pos = end + 2
+            continue
+        
+        if c in '\'"' or (c == '/' and (not prev or prev[-1] in JS_REGEX_AFTER or prev in JS_REGEX_KEYWORDS)):
+            end = js_literal_end(code, pos, c)
+            if end < 0:
+                return code
+            if c == '/':
+                end = JS_FLAGS_RE.match(code, end).end()
+        elif c == '`':
+            end = js_template_end(code, pos)
+            if end < 0:
+                return code
+        else:
+            end = JS_TOKEN_RE.match(code, pos).end()
+            if code[pos:end].isspace():
+                pending = '\n' if c == '\n' or pending == '\n' else ' '
+                pos = end
+                continue
+        
+        token = code[pos:end]
+        if prev and pending == '\n':
+            out.append('\n')
+        elif prev and pending and prev[-1] not in JS_TIGHT and token[0] not in JS_TIGHT:
+            out.append(' ')
+        out.append(token)
+        prev = token
+        pending = ''
+        pos = end
+    return ''.join(out)
+
+def minify_script(attrs, body, cache_dir=None):
+    """Minified body of a <script> with these attributes"""
+    if not body.strip():
+        return ''
+    match = SCRIPT_TYPE_RE.search(attrs)
+    script_type = match.group(1).lower() if match else ''
+    if script_type in JS_TYPES:
+        return minify_block('js', body, cache_dir)
+    if script_type in JSON_TYPES:
+        try:
+            return json.dumps(json.loads(body), ensure_ascii=False, separators=(',', ':'))
+        except ValueError:
+            return body
+    # Templates and other data blocks are kept verbatim
+    return body
+
+def minify_html(html, cache_dir=None):
+    """Minify a page: comments, whitespace runs and inline CSS/JS"""
+    out = []
+    text_run = []  # text between tags; dropped comments don't break it
+    for match in MINIFY_TOKEN_RE.finditer(html):
+        comment, open_tag, name, attrs, body, close_tag, tag, text = match.groups()
+        if text is not None:
+            text_run.append(text)
+            continue
+        if comment is not None and not KEEP_COMMENT_RE.match(comment):
+            continue
+        if text_run:
+            out.append(WHITESPACE_RE.sub(collapse_whitespace, ''.join(text_run)))
+            text_run = []
+        
+        if comment is not None:
+            out.append(comment)
+        elif open_tag is not None:
+            name = name.lower()
+            if name == 'script':
+                body = minify_script(attrs, body, cache_dir)
+            elif name == 'style':
+                body = minify_block('css', body, cache_dir)
+            out.append(open_tag + body + close_tag)
+        else:
+            out.append(tag)
+    out.append(WHITESPACE_RE.sub(collapse_whitespace, ''.join(text_run)))
+    return ''.join(out)
+
+MINIFIERS = {'css': minify_css, 'js': minify_js}
+
+def minify_cached(kind, text, cache_dir=None):
+    """Minify a page ('html') or block ('css', 'js'), looked up by content hash first
+
+    Results live in cache_dir/<xx>/<hash>, shared by workers and runs,
+    so an unchanged page or block is only ever minified once.
+    """
+    minify = partial(minify_html, cache_dir=cache_dir) if kind == 'html' else MINIFIERS[kind]
+    if not cache_dir:
+        return minify(text)
+    
+    key = content_hash(f"{MINIFY_VERSION}\0{kind}\0{text}".encode('utf-8'))
+    path = os.path.join(cache_dir, key[:2], key)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    
+    result = minify(text)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_file_atomic(path, result.encode('utf-8'))
+    return result
+
+@lru_cache(maxsize=1024)
+def minify_block(kind, text, cache_dir=None):
+    """Inline CSS/JS, memoized per worker since pages share most blocks"""
+    return minify_cached(kind, text, cache_dir)
+
+# --precompress: page.html.br / page.html.gz next to each page (and
+# css/*.css, js/*.js with --precompress-assets) for hosts that serve
+# precompressed files. Small files aren't worth a sidecar
+COMPRESS_FORMATS = ('br', 'gz')
+COMPRESS_MIN_BYTES = 1024
+ASSET_DIRS = (('css', '*.css'), ('js', '*.js'))
+
+def compress_data(data, fmt):
+    """data compressed as fmt at the highest level, deterministic output"""
+    if fmt == 'br':
+        return optional_module('brotli').compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def available_formats(formats):
+    """formats this Python can write; brotli is an optional dependency"""
+    return tuple(fmt for fmt in formats if fmt != 'br' or optional_module('brotli') is not None)
+
+def sidecars_current(path, formats):
+    """True if every sidecar of path exists and is newer than it (for runs without state)"""
+    try:
+        mtime = os.stat(path).st_mtime
+        return all(os.stat(f"{path}.{fmt}").st_mtime >= mtime for fmt in formats)
+    except FileNotFoundError:
+        return False
+
+def compress_file(path, previous, formats=COMPRESS_FORMATS, min_bytes=COMPRESS_MIN_BYTES, fsync=DEFAULT_FSYNC):
+    """Write or refresh path's sidecars, returns a result dict
+
+    Skipped when the file's hash matches previous['compressed'], the
+    hash the sidecars were made from.
+    """
+    result = {'path': path, 'status': 'failed', 'error': None, 'hash': None, 'size': 0, 'sizes': {}}
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        result['hash'] = content_hash(data)
+        result['size'] = len(data)
+        
+        if previous and previous.get('compressed') == result['hash']:
+            result['status'] = 'skipped'
+            return result
+        
+        # The status is only set once every sidecar is done, so a
+        # failure part way stays 'failed' and is retried next run
+        status = 'skipped'
+        for fmt in formats:
+            sidecar = f"{path}.{fmt}"
+            packed = compress_data(data, fmt) if len(data) >= min_bytes else None
+            if packed is None or len(packed) >= len(data):
+                # Not worth it; don't leave a stale one behind
+                try:
+                    os.remove(sidecar)
+                    status = 'changed'
+                except FileNotFoundError:
+                    pass
+                continue
+            write_file_atomic(sidecar, packed, fsync == 'file')
+            result['sizes'][fmt] = len(packed)
+            status = 'changed'
+        result['status'] = status
+        
+    except Exception as e:
+        result['error'] = str(e)
+    
+    return result
+
+def precompress(directory, pages, state=None, assets=False, formats=COMPRESS_FORMATS, min_bytes=COMPRESS_MIN_BYTES, workers=1, executor=None, fsync=DEFAULT_FSYNC):
+    """Compress pages (path -> state entry) and optionally css/js on the pool
+
+    Pages whose entry says the sidecars match their hash are not even
+    read. state gets each file's 'compressed' hash; without state, files
+    with sidecars newer than themselves are skipped.
+    """
+    root = os.path.abspath(directory)
+    usable = available_formats(formats)
+    if len(usable) < len(formats):
+        print("❌ Brotli sidecars need the brotli package (pip install brotli), writing gzip only")
+    if not usable:
+        return
+    
+    def current(path, entry):
+        if state is None:
+            return sidecars_current(path, usable)
+        # The page hash is already known, so no need to read it
+        return bool(entry) and entry.get('hash') is not None and entry.get('compressed') == entry['hash']
+    
+    def tasks():
+        for path, entry in pages.items():
+            if current(path, entry):
+                counts['skipped'] += 1
+            else:
+                yield path, entry
+        if assets:
+            for folder, pattern in ASSET_DIRS:
+                if os.path.isdir(os.path.join(root, folder)):
+                    for asset in iter_html_files(os.path.join(root, folder), include=(pattern,)):
+                        entry = state.get(str(asset)) if state is not None else None
+                        if state is None and current(str(asset), entry):
+                            counts['skipped'] += 1
+                        else:
+                            yield str(asset), entry
+    
+    counts = {'changed': 0, 'skipped': 0, 'failed': 0}
+    job = partial(compress_file, formats=usable, min_bytes=min_bytes, fsync=fsync)
+    totals = {'size': 0, **{fmt: 0 for fmt in usable}}
+    changed_dirs = set()
+    for result in map_files(job, tasks(), executor, workers, STREAM_CHUNKSIZE):
+        counts[result['status']] += 1
+        if result['error']:
+            print(f"❌ Error compressing {os.path.relpath(result['path'], root)}: {result['error']}")
+            continue
+        if state is not None:
+            entry = state.setdefault(result['path'], {})
+            entry['hash'] = entry['compressed'] = result['hash']
+        if result['status'] == 'changed':
+            changed_dirs.add(os.path.dirname(result['path']))
+            totals['size'] += result['size']
+            for fmt, size in result['sizes'].items():
+                totals[fmt] += size
+    
+    if fsync != 'none':
+        fsync_dirs(changed_dirs)
+    
+    sizes = ', '.join(f"{fmt} {totals[fmt] / 1024:.1f} KB" for fmt in usable)
+    print(f"\n📦 Precompressed {counts['changed']} file(s) ({totals['size'] / 1024:.1f} KB → {sizes}), "
+          f"{counts['skipped']} unchanged, {counts['failed']} failed")
+
+# --images: responsive WebP/AVIF copies of everything in images/ at
+# IMAGE_WIDTHS (never wider than the original), encoded on the pool with
+# Pillow into images/optimized/. Its manifest.json lists each source's
+# hash and variants, so re-runs only encode new or changed images.
+# --srcset points <img> tags at the variants; srcset can't fall back
+# between formats, so it uses SRCSET_FORMAT (every current browser
+# decodes WebP). Its sizes come from the tag's width or the image's own
+# width (SRCSET_SIZES: full viewport width on smaller screens)
+IMAGES_DIR = 'images'
+IMAGE_OUT_DIR = 'optimized'
+IMAGE_MANIFEST = 'manifest.json'
+IMAGE_VERSION = 1
+IMAGE_WIDTHS = (480, 960, 1600)
+IMAGE_FORMATS = ('webp', 'avif')
+IMAGE_QUALITY = 75
+IMAGE_SAVE_OPTIONS = {'webp': {'method': 4}, 'avif': {'speed': 6}}
+IMAGE_SOURCES = ('*.jpg', '*.jpeg', '*.png', '*.webp', '*.avif')
+IMAGE_ASSETS = IMAGE_SOURCES + ('*.gif', '*.svg', '*.ico')
+SRCSET_FORMAT = 'webp'
+SRCSET_SIZES = '(max-width: {0}px) 100vw, {0}px'
+SRCSET_SIZES_RE = re.compile(r'100vw|\(max-width: (\d+)px\) 100vw, \1px')
+OVERSIZED_BYTES = 200 * 1024
+IMG_TAG_RE = re.compile(r'<img\b([^>]*)>', re.IGNORECASE)
+SRCSET_ATTR_RE = re.compile(r'''\s+srcset\s*=\s*(?:"[^"]*"|'[^']*'|[^\s>]+)''', re.IGNORECASE)
+SIZES_ATTR_RE = re.compile(r'''\s+sizes\s*=\s*(?:"[^"]*"|'[^']*'|[^\s>]+)''', re.IGNORECASE)
+
+def writable_image_formats(formats):
+    """formats the installed Pillow can write; Pillow is an optional dependency"""
+    Image = optional_module('PIL.Image')
+    if Image is None:
+        return ()
+    Image.init()
+    return tuple(fmt for fmt in formats if fmt.upper() in Image.SAVE)
+
+def variant_name(source, width, fmt):
+    """Site-relative path of a source image's variant
+
+    The source extension stays in the name so photo.jpg and photo.png
+    don't overwrite each other.
+    """
+    rel_dir, name = posixpath.split(posixpath.relpath(source, IMAGES_DIR))
+    stem, ext = posixpath.splitext(name)
+    return posixpath.join(IMAGES_DIR, IMAGE_OUT_DIR, rel_dir, f"{stem}-{ext.lstrip('.').lower()}-{width}w.{fmt}")
+
+def load_image_manifest(root):
+    """Sources and variants from the last --images run, {} if none"""
+    try:
+        with open(os.path.join(root, IMAGES_DIR, IMAGE_OUT_DIR, IMAGE_MANIFEST), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if manifest.get('version') != IMAGE_VERSION:
+        return {}
+    return manifest.get('images', {})
+
+def encode_image(path, previous, root, widths=IMAGE_WIDTHS, formats=IMAGE_FORMATS, quality=IMAGE_QUALITY, fsync=DEFAULT_FSYNC):
+    """Write the variants of one image, returns a result dict
+
+    Skipped when the image's hash and settings match previous (its
+    manifest entry) and the variants are still there. Animated images
+    get no variants.
+    """
+    Image, ImageOps = optional_module('PIL.Image'), optional_module('PIL.ImageOps')
+    source = os.path.relpath(path, root).replace(os.sep, '/')
+    settings = [list(widths), list(formats), quality]
+    result = {'path': path, 'source': source, 'status': 'failed', 'error': None, 'size': 0, 'entry': previous}
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        result['size'] = len(data)
+        entry = {'hash': content_hash(data), 'settings': settings, 'size': len(data), 'variants': []}
+        
+        if previous and all(previous.get(key) == entry[key] for key in ('hash', 'settings')) and \
+                all(os.path.exists(os.path.join(root, variant['url'])) for variant in previous['variants']):
+            result['status'] = 'skipped'
+            return result
+        
+        image = Image.open(io.BytesIO(data))
+        entry['width'], entry['height'] = image.size
+        if getattr(image, 'is_animated', False):
+            entry['animated'] = True
+        else:
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ('RGB', 'RGBA'):
+                alpha = image.mode in ('LA', 'PA', 'RGBa') or 'transparency' in image.info
+                image = image.convert('RGBA' if alpha else 'RGB')
             
-            # Get meta tags for this specific page
-            page_meta = generate_page_meta(
-                html_file.name, 
-                base_title, 
-                base_desc, 
-                base_keywords,
-                shop_name,
-                location
+            for width in sorted({min(width, image.width) for width in widths}):
+                height = max(1, round(image.height * width / image.width))
+                frame = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                for fmt in formats:
+                    buffer = io.BytesIO()
+                    frame.save(buffer, fmt.upper(), quality=quality, **IMAGE_SAVE_OPTIONS.get(fmt, {}))
+                    url = variant_name(source, width, fmt)
+                    target = os.path.join(root, url)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    write_file_atomic(target, buffer.getvalue(), fsync == 'file')
+                    entry['variants'].append({'url': url, 'width': width, 'format': fmt, 'bytes': buffer.tell()})
+        
+        # Widths or formats that were dropped since the last run
+        kept = {variant['url'] for variant in entry['variants']}
+        for variant in (previous or {}).get('variants', ()):
+            if variant['url'] not in kept:
+                try:
+                    os.remove(os.path.join(root, variant['url']))
+                except FileNotFoundError:
+                    pass
+        
+        result['entry'] = entry
+        result['status'] = 'changed'
+        
+    except Exception as e:
+        result['error'] = str(e)
+    
+    return result
+
+def image_savings(entry):
+    """(source bytes, bytes of its smallest full-width variant) for one manifest entry"""
+    variants = entry.get('variants')
+    if not variants:
+        return entry['size'], entry['size']
+    widest = max(variant['width'] for variant in variants)
+    return entry['size'], min(entry['size'], *(variant['bytes'] for variant in variants if variant['width'] == widest))
+
+def oversized_images(root, pages, max_bytes=OVERSIZED_BYTES):
+    """Images over max_bytes in images/ and the site root, largest first
+
+    Each is (path, bytes, pages whose <head> links it): those are paid
+    for on every page view.
+    """
+    folder = os.path.join(root, IMAGES_DIR)
+    files = iter_html_files(root, include=IMAGE_ASSETS)
+    if os.path.isdir(folder):
+        files = chain(files, iter_html_files(folder, recursive=True, include=IMAGE_ASSETS, exclude=(IMAGE_OUT_DIR,)))
+    large = {}
+    for path in files:
+        size = resource_size(str(path))
+        if size > max_bytes:
+            large[os.path.relpath(path, root).replace(os.sep, '/')] = size
+    if not large:
+        return []
+    
+    linked = Counter()
+    for page in pages:
+        with open(page, 'rb') as f:
+            data = f.read()
+        head_end = HEAD_END_RE.search(data)
+        head = data[:head_end.start() if head_end else len(data)].decode('utf-8', 'replace')
+        linked.update({resource['local'] for resource in head_resources(head, str(page), root)
+                       if resource['kind'] == 'link' and resource['local'] in large})
+    return sorted(((path, size, linked[path]) for path, size in large.items()), key=lambda item: -item[1])
+
+def optimize_images(directory, pages=(), widths=IMAGE_WIDTHS, formats=IMAGE_FORMATS, quality=IMAGE_QUALITY, max_bytes=OVERSIZED_BYTES, workers=1, executor=None, fsync=DEFAULT_FSYNC, dry_run=False):
+    """Bring images/optimized/ up to date on the pool, returns the manifest entries
+
+    Prints the bytes the variants save over the originals and flags
+    images over max_bytes, noting which of pages link them from <head>.
+    Without Pillow (or with dry_run) nothing is encoded and the last
+    run's manifest is returned as is.
+    """
+    root = os.path.abspath(directory)
+    folder = os.path.join(root, IMAGES_DIR)
+    previous = load_image_manifest(root)
+    manifest = previous
+    usable = writable_image_formats(formats)
+    
+    if optional_module('PIL.Image') is None:
+        print("\n❌ Image variants need Pillow (pip install pillow), only reporting sizes")
+    elif len(usable) < len(formats):
+        missing = ', '.join(fmt for fmt in formats if fmt not in usable)
+        print(f"\n❌ This Pillow can't write {missing}, encoding {', '.join(usable) or 'nothing'}")
+    
+    if usable and not dry_run and os.path.isdir(folder):
+        print(f"\n🖼️  Encoding {', '.join(usable)} variants of {IMAGES_DIR}/ at {', '.join(map(str, widths))}px...\n")
+        counts = {'changed': 0, 'skipped': 0, 'failed': 0}
+        manifest = {}
+        sources = iter_html_files(folder, recursive=True, include=IMAGE_SOURCES, exclude=(IMAGE_OUT_DIR,))
+        tasks = ((str(path), previous.get(os.path.relpath(path, root).replace(os.sep, '/'))) for path in sources)
+        job = partial(encode_image, root=root, widths=tuple(widths), formats=usable, quality=quality, fsync=fsync)
+        for result in map_files(job, tasks, executor, workers, STREAM_CHUNKSIZE):
+            counts[result['status']] += 1
+            if result['error']:
+                print(f"❌ Error encoding {result['source']}: {result['error']}")
+            if result['entry']:
+                manifest[result['source']] = result['entry']
+            if result['status'] == 'changed':
+                size, best = image_savings(result['entry'])
+                note = ' (animated, left as is)' if result['entry'].get('animated') else ''
+                print(f"✅ {result['source']:<40} {size / 1024:.1f} KB → {best / 1024:.1f} KB{note}")
+        
+        # Sources that are gone take their variants with them
+        for source in set(previous) - set(manifest):
+            for variant in previous[source]['variants']:
+                try:
+                    os.remove(os.path.join(root, variant['url']))
+                except FileNotFoundError:
+                    pass
+        
+        if counts['changed'] or manifest.keys() != previous.keys():
+            data = json.dumps({'version': IMAGE_VERSION, 'images': manifest}, indent=1, sort_keys=True)
+            write_file_atomic(os.path.join(folder, IMAGE_OUT_DIR, IMAGE_MANIFEST), data.encode('utf-8'), fsync != 'none')
+        print(f"\n🖼️  Images: {counts['changed']} encoded, {counts['skipped']} unchanged, {counts['failed']} failed")
+    
+    if manifest:
+        before = after = 0
+        for entry in manifest.values():
+            size, best = image_savings(entry)
+            before += size
+            after += best
+        print(f"   📉 {len(manifest)} image(s): {before / 1024 / 1024:.1f} MB → {after / 1024 / 1024:.1f} MB at full width"
+              f" (-{(before - after) / 1024 / 1024:.1f} MB, {(before - after) * 100 / max(before, 1):.1f}%)")
+    
+    for path, size, linked in oversized_images(root, pages, max_bytes):
+        where = f" (linked from the <head> of {linked} page(s))" if linked else ''
+        print(f"   ⚠️  {path} is {size / 1024:.1f} KB{where}")
+    
+    return manifest
+
+def srcset_images(manifest, directory, sizes, fmt=SRCSET_FORMAT):
+    """Per-source srcset candidates and width for add_srcset, with a hash for page state
+
+    sizes is the dimension index (see index_dimensions); it has the
+    width as displayed, EXIF rotation included.
+    """
+    images = {}
+    for source, entry in manifest.items():
+        candidates = [(variant['url'], variant['width']) for variant in entry.get('variants', ()) if variant['format'] == fmt]
+        if candidates:
+            images[source] = {'width': sizes.get(source, (None, None))[0],
+                              'candidates': sorted(candidates, key=lambda candidate: candidate[1])}
+    return {
+        'root': os.path.abspath(directory),
+        'images': images,
+        'hash': content_hash(json.dumps(images, sort_keys=True).encode('utf-8'))
+    }
+
+def insert_attrs(tag, text):
+    """tag with text added after its last attribute"""
+    end = len(tag) - (2 if tag.endswith('/>') else 1)
+    start = len(tag[:end].rstrip())
+    return tag[:start] + text + tag[start:]
+
+def add_srcset(html, page_path, images):
+    """Give <img> tags a srcset of their variants, returns (html, tags changed)
+
+    Tags with a srcset of their own are left alone; ones pointing into
+    images/optimized/ are refreshed. Without a sizes attribute the
+    browser would pick a variant for the full viewport width, so tags
+    get SRCSET_SIZES for their width attribute or else the image's own
+    width, and no srcset when neither is known.
+    """
+    page_dir = os.path.dirname(page_path)
+    marker = f"{IMAGES_DIR}/{IMAGE_OUT_DIR}/"
+    changed = 0
+    
+    def rewrite(match):
+        nonlocal changed
+        tag = match.group(0)
+        attrs = tag_attrs(match.group(1))
+        src = attrs.get('src')
+        if not src or src.startswith('data:') or url_origin(src):
+            return tag
+        if 'srcset' in attrs and marker not in attrs['srcset']:
+            return tag
+        image = images['images'].get(unquote(local_resource(src, page_path, images['root'])))
+        if not image:
+            return tag
+        
+        # Our own sizes (100vw from before SRCSET_SIZES included) follow the width
+        ours = 'srcset' in attrs and SRCSET_SIZES_RE.fullmatch(attrs.get('sizes', '').strip())
+        sizes = attrs.get('sizes') if 'sizes' in attrs and not ours else None
+        if sizes is None:
+            display = attrs.get('width', '').strip()
+            display = int(display) if display.isdigit() and int(display) else image['width']
+            if not display:
+                return tag
+            sizes = SRCSET_SIZES.format(display)
+        
+        srcset = ', '.join(f"{quote(os.path.relpath(os.path.join(images['root'], url), page_dir).replace(os.sep, '/'))} {width}w"
+                           for url, width in image['candidates'])
+        if attrs.get('srcset') == srcset and attrs.get('sizes') == sizes:
+            return tag
+        changed += 1
+        tag = SRCSET_ATTR_RE.sub('', tag)
+        if ours:
+            tag = SIZES_ATTR_RE.sub('', tag)
+        return insert_attrs(tag, f' srcset="{srcset}"' + ('' if 'sizes' in attrs and not ours else f' sizes="{sizes}"'))
+    
+    return IMG_TAG_RE.sub(rewrite, html), changed
+
+# Image dimensions for <img> width/height (no layout shift while images
+# load) and og:image:width/height, read from the first bytes of each
+# file without Pillow. DIMENSION_INDEX keeps them between runs keyed by
+# absolute path and checked against size and mtime, so only new or
+# changed images are opened
+DIMENSION_VERSION = 1
+DIMENSION_INDEX = os.path.join(os.path.dirname(MINIFY_CACHE_DIR), 'dimensions.json')
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# ISO-BMFF (AVIF/HEIF) boxes on the way to 'ispe', with the bytes
+# before their children
+BMFF_CONTAINERS = {b'meta': 4, b'iprp': 0, b'ipco': 0}
+
+def exif_orientation(segment):
+    """EXIF orientation (1-8) from a JPEG APP1 segment, 1 if absent"""
+    if not segment.startswith(b'Exif\0\0'):
+        return 1
+    tiff = segment[6:]
+    order = '<' if tiff[:2] == b'II' else '>'
+    offset = struct.unpack(order + 'I', tiff[4:8])[0]
+    count = struct.unpack(order + 'H', tiff[offset:offset + 2])[0]
+    for number in range(count):
+        entry = offset + 2 + number * 12
+        tag, _, _, value = struct.unpack(order + 'HHIH', tiff[entry:entry + 10])
+        if tag == 0x0112:
+            return value
+    return 1
+
+def jpeg_size(f):
+    """(width, height) from the first frame header, as displayed after EXIF rotation"""
+    f.seek(2)
+    orientation = 1
+    while True:
+        if f.read(1) != b'\xff':
+            return None
+        marker = f.read(1)
+        # Any number of 0xff fill bytes may come before a marker
+        while marker == b'\xff':
+            marker = f.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            continue
+        if marker in (0xD9, 0xDA):
+            return None
+        length = struct.unpack('>H', f.read(2))[0]
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack('>xHH', f.read(5))
+            # 5-8 are turned a quarter, browsers show them that way
+            return (height, width) if orientation >= 5 else (width, height)
+        if marker == 0xE1 and orientation == 1:
+            orientation = exif_orientation(f.read(length - 2))
+        else:
+            f.seek(length - 2, 1)
+
+def bmff_size(f, end):
+    """(width, height) from the first 'ispe' box before end"""
+    while f.tell() + 8 <= end:
+        start = f.tell()
+        size, kind = struct.unpack('>I4s', f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - start
+        if size < header:
+            return None
+        if kind == b'ispe':
+            return struct.unpack('>4xII', f.read(12))
+        if kind in BMFF_CONTAINERS:
+            f.seek(BMFF_CONTAINERS[kind], 1)
+            found = bmff_size(f, start + size)
+            if found:
+                return found
+        f.seek(start + size)
+    return None
+
+def image_dimensions(path):
+    """(width, height) of a JPEG, PNG, GIF, WebP or AVIF file from its header, None if unknown"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(32)
+            if head.startswith(PNG_SIGNATURE) and head[12:16] == b'IHDR':
+                return struct.unpack('>II', head[16:24])
+            if head.startswith((b'GIF87a', b'GIF89a')):
+                return struct.unpack('<HH', head[6:10])
+            if head.startswith(b'\xff\xd8'):
+                return jpeg_size(f)
+            if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+                chunk = head[12:16]
+                if chunk == b'VP8 ':
+                    width, height = struct.unpack('<HH', head[26:30])
+                    return width & 0x3fff, height & 0x3fff
+                if chunk == b'VP8L':
+                    bits = int.from_bytes(head[21:25], 'little')
+                    return (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+                if chunk == b'VP8X':
+                    return int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1
+                return None
+            if head[4:8] == b'ftyp':
+                f.seek(0)
+                return bmff_size(f, os.fstat(f.fileno()).st_size)
+    except (OSError, struct.error, IndexError):
+        pass
+    return None
+
+def load_dimension_index(path=DIMENSION_INDEX):
+    """Dimension index from earlier runs (absolute path -> [size, mtime_ns, width, height])"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if index.get('version') != DIMENSION_VERSION:
+        return {}
+    return index.get('images', {})
+
+def save_dimension_index(index, path=DIMENSION_INDEX):
+    """Save the dimension index for the next run"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    data = json.dumps({'version': DIMENSION_VERSION, 'images': index}, separators=(',', ':'), sort_keys=True)
+    write_file_atomic(path, data.encode('utf-8'))
+
+def index_dimensions(directory, index):
+    """Sizes of the images in the site root and images/, returns ({site-relative path: (width, height)}, files read, index changes)
+
+    index is brought up to date in place; entries of this site's images
+    that are gone are dropped. Files read counts only images whose
+    header gave a size (not svg/ico or broken files); index changes
+    counts entries written or dropped, for deciding to save it.
+    """
+    root = os.path.abspath(directory)
+    folder = os.path.join(root, IMAGES_DIR)
+    files = iter_html_files(root, include=IMAGE_ASSETS)
+    if os.path.isdir(folder):
+        files = chain(files, iter_html_files(folder, recursive=True, include=IMAGE_ASSETS, exclude=(IMAGE_OUT_DIR,)))
+    
+    dimensions = {}
+    seen = set()
+    read = changes = 0
+    for path in files:
+        path = str(path)
+        try:
+            info = os.stat(path)
+        except OSError:
+            continue
+        seen.add(path)
+        entry = index.get(path)
+        if not entry or entry[:2] != [info.st_size, info.st_mtime_ns]:
+            size = image_dimensions(path)
+            entry = index[path] = [info.st_size, info.st_mtime_ns, *(size or (None, None))]
+            changes += 1
+            if size:
+                read += 1
+        if entry[2]:
+            dimensions[os.path.relpath(path, root).replace(os.sep, '/')] = (entry[2], entry[3])
+    
+    prefix = root + os.sep
+    gone = [path for path in index if path.startswith(prefix) and path not in seen]
+    for path in gone:
+        del index[path]
+    return dimensions, read, changes + len(gone)
+
+def add_image_dimensions(html, page_path, dimensions):
+    """Give <img> tags without width and height their image's size, returns (html, tags changed)
+
+    dimensions is {'root', 'images' (see index_dimensions), 'hash'}.
+    Tags with either attribute are left alone, their CSS may rely on it.
+    """
+    changed = 0
+    
+    def rewrite(match):
+        nonlocal changed
+        tag = match.group(0)
+        attrs = tag_attrs(match.group(1))
+        src = attrs.get('src')
+        if not src or 'width' in attrs or 'height' in attrs or src.startswith('data:') or url_origin(src):
+            return tag
+        size = dimensions['images'].get(unquote(local_resource(src, page_path, dimensions['root'])))
+        if not size:
+            return tag
+        changed += 1
+        return insert_attrs(tag, f' width="{size[0]}" height="{size[1]}"')
+    
+    return IMG_TAG_RE.sub(rewrite, html), changed
+
+# --extract-meta: pages without a page template get keywords and a
+# description from their own visible text, weighted by TF-IDF across all
+# pages of the site instead of all sharing the index meta. TERM_INDEX
+# keeps each page's top terms between runs, keyed by path like the
+# dimension index and checked against a hash of the page body, so only
+# edited pages are tokenized again. With NumPy the weighting runs over
+# flat CSR-style arrays; without it, in plain Python.
+TERM_VERSION = 1
+TERM_INDEX = os.path.join(os.path.dirname(MINIFY_CACHE_DIR), 'terms.json')
+PAGE_TERMS = 32
+PAGE_SENTENCES = 4
+EXTRACT_KEYWORDS = 8
+SENTENCE_MIN_WORDS = 6
+SENTENCE_MAX_CHARS = 160
+HIDDEN_BLOCK_RE = re.compile(r'<(head|script|style|noscript|template|svg|nav|footer)\b.*?</\1\s*>|<!--.*?-->', re.DOTALL | re.IGNORECASE)
+BLOCK_TAG_RE = re.compile(r'</?(?:p|div|h[1-6]|li|ul|ol|dl|dt|dd|br|hr|tr|td|th|table|section|article|aside|header|main|form|label|button|option|select|blockquote|figcaption)\b[^>]*>', re.IGNORECASE)
+WORD_RE = re.compile(r'[^\W\d_]{3,}')
+SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+STOP_WORDS = frozenset("""
+    about above after again against all also and any are because been before being below between both but can
+    could did does doing down during each few for from further had has have having her here hers herself him
+    himself his how into its itself just more most must myself nor not now off once only other our ours
+    ourselves out over own same she should some such than that the their theirs them themselves then there
+    these they this those through too under until upon very was were what when where which while who whom why
+    will with would you your yours yourself yourselves get got may might one two via per yet
+""".split())
+
+def visible_text(html):
+    """Text a visitor sees, one line per block element"""
+    html = HIDDEN_BLOCK_RE.sub(' ', html)
+    html = BLOCK_TAG_RE.sub('\n', html)
+    return unescape(HTML_TAG_RE.sub(' ', html))
+
+def description_candidates(text):
+    """The first few sentences of text long enough for a description"""
+    sentences = []
+    for line in text.splitlines():
+        for sentence in SENTENCE_END_RE.split(' '.join(line.split())):
+            if len(sentence.split()) >= SENTENCE_MIN_WORDS and sentence not in sentences:
+                sentences.append(sentence[:SENTENCE_MAX_CHARS])
+                if len(sentences) == PAGE_SENTENCES:
+                    return sentences
+    return sentences
+
+def term_entry(path, previous):
+    """Term index entry of one page: [size, mtime_ns, body hash, terms, counts, sentences]
+
+    Fragments get [size, mtime_ns, None]. The page is only tokenized
+    when its body differs from previous; returns None if unreadable.
+    """
+    try:
+        with open(path, 'rb') as f:
+            info = os.fstat(f.fileno())
+            data = f.read()
+    except OSError:
+        return None
+    if is_fragment(data):
+        return [info.st_size, info.st_mtime_ns, None]
+    
+    head_end = HEAD_END_RE.search(data)
+    body = data[head_end.end():] if head_end else data
+    digest = content_hash(body)
+    if previous and previous[2] == digest:
+        return [info.st_size, info.st_mtime_ns, *previous[2:]]
+    
+    text = visible_text(body.decode(page_charset(data), 'replace'))
+    counts = Counter(word for word in map(str.lower, WORD_RE.findall(text)) if word not in STOP_WORDS)
+    top = counts.most_common(PAGE_TERMS)
+    return [info.st_size, info.st_mtime_ns, digest, [term for term, _ in top], [count for _, count in top], description_candidates(text)]
+
+def load_term_index(path=TERM_INDEX):
+    """Term index from earlier runs (absolute path -> entry, see term_entry)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if index.get('version') != TERM_VERSION:
+        return {}
+    return index.get('pages', {})
+
+def save_term_index(index, path=TERM_INDEX):
+    """Save the term index for the next run"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    data = json.dumps({'version': TERM_VERSION, 'pages': index}, separators=(',', ':'), ensure_ascii=False)
+    write_file_atomic(path, data.encode('utf-8'))
+
+def index_terms(root, files, index, workers=1, executor=None):
+    """Term entries of the site's pages, returns ({path: entry}, files read, entries dropped)
+
+    index is brought up to date in place, tokenizing in the workers;
+    entries of this site's pages that are gone are dropped. Files read
+    counts only pages that were opened and read.
+    """
+    pages = {}
+    stale = []
+    for path in files:
+        path = str(path)
+        try:
+            info = os.stat(path)
+        except OSError:
+            continue
+        entry = index.get(path)
+        if entry and entry[:2] == [info.st_size, info.st_mtime_ns]:
+            pages[path] = entry
+        else:
+            stale.append((path, entry))
+    
+    chunksize = max(1, len(stale) // (resolve_workers(workers) * 4))
+    read = 0
+    for (path, _), entry in zip(stale, map_files(term_entry, stale, executor, workers, chunksize)):
+        if entry:
+            pages[path] = index[path] = entry
+            read += 1
+    
+    prefix = os.path.abspath(root) + os.sep
+    gone = [path for path in index if path.startswith(prefix) and path not in pages]
+    for path in gone:
+        del index[path]
+    return {path: entry for path, entry in pages.items() if entry[2]}, read, len(gone)
+
+def term_weights(entries):
+    """TF-IDF weight of each kept term, one list per entry"""
+    total = len(entries)
+    np = optional_module('numpy') if entries else None
+    if np is not None:
+        # One CSR matrix for the whole site: row i is entries[i]
+        lengths = np.fromiter((len(entry[3]) for entry in entries), dtype=np.int64, count=total)
+        indptr = np.concatenate(([0], np.cumsum(lengths)))
+        vocabulary = {}
+        columns = np.fromiter((vocabulary.setdefault(term, len(vocabulary)) for entry in entries for term in entry[3]),
+                              dtype=np.int64, count=int(indptr[-1]))
+        data = np.fromiter((count for entry in entries for count in entry[4]), dtype=np.float64, count=int(indptr[-1]))
+        df = np.bincount(columns, minlength=len(vocabulary))
+        idf = np.log((1 + total) / (1 + df)) + 1
+        weights = (data * idf[columns]).tolist()
+        return [weights[indptr[row]:indptr[row + 1]] for row in range(total)]
+    
+    df = Counter(term for entry in entries for term in entry[3])
+    idf = {term: math.log((1 + total) / (1 + count)) + 1 for term, count in df.items()}
+    return [[count * idf[term] for term, count in zip(entry[3], entry[4])] for entry in entries]
+
+def extract_meta(pages, keywords=EXTRACT_KEYWORDS):
+    """Top TF-IDF terms and best description sentence per page, {path: (terms, sentence)}
+
+    A sentence scores the summed weight of the page's terms in it per
+    word, so short dense sentences beat long generic ones.
+    """
+    paths = list(pages)
+    entries = [pages[path] for path in paths]
+    extracted = {}
+    for path, entry, weights in zip(paths, entries, term_weights(entries)):
+        # Stable sort: ties keep the page's own frequency order
+        order = sorted(range(len(weights)), key=lambda index: -weights[index])[:keywords]
+        terms = [entry[3][index] for index in order]
+        by_term = dict(zip(entry[3], weights))
+        best, best_score = None, 0.0
+        for sentence in entry[5]:
+            words = [word.lower() for word in WORD_RE.findall(sentence)]
+            score = sum(by_term.get(word, 0.0) for word in words) / max(len(sentence.split()), 1)
+            if score > best_score:
+                best, best_score = sentence, score
+        extracted[path] = (terms, best)
+    return extracted
+
+def extracted_page_meta(page_meta, extracted, brand, location):
+    """page_meta with keywords and description from extract_meta"""
+    terms, sentence = extracted
+    if terms:
+        page_meta['keywords'] = ', '.join(terms + [value for value in (brand, location) if value])
+    if sentence:
+        page_meta['desc'] = clip_description(sentence)
+    return page_meta
+
+def process_file(options, html_file, previous, extracted=None):
+    """Update one HTML file if its output changes, returns a result dict
+
+    options is a run options namespace (see new_options) with the
+    site's meta and the loaded stages filled in by process_html_files.
+
+    result['timings'] holds seconds spent reading (and hashing),
+    generating meta, rewriting and writing the page, result['cpu'] the
+    CPU seconds of the whole call. With options.phases result['phases']
+    splits the rewrite into its steps. With options.dry_run nothing is
+    written; result['diff'] holds a unified diff of the head instead.
+
+    Fragment files are left alone (result['fragment'] is True). Given
+    options.fragments (see load_fragments), the ones the page fetches
+    are inlined and the page is redone when any of them changes.
+
+    Given options.policy (see load_hints_policy) the head also gets
+    resource hints; result['hints'] holds the blocking bytes estimate.
+
+    Given options.variants (see srcset_images) <img> tags get a srcset
+    of their variants; result['srcset'] holds the number of tags
+    changed. Given options.dimensions (see add_image_dimensions) they
+    also get width and height; result['dimensions'] holds the number of
+    tags changed.
+
+    With options.minify the output is minified (see minify_cached) and
+    result['minify'] holds its size in bytes before and after.
+    
+    Given extracted (see extract_meta) the page's keywords and
+    description come from its own text.
+    """
+    timings = {'read': 0.0, 'meta': 0.0, 'rewrite': 0.0, 'write': 0.0}
+    cpu = time.thread_time()
+    result = {'name': html_file.name, 'path': str(html_file), 'title': None, 'status': 'failed', 'error': None, 'state': previous, 'fragment': False, 'timings': timings}
+    phases = result['phases'] = {} if options.phases else None
+    site = options.site
+    tmp_path = None
+    try:
+        clock = time.perf_counter()
+        
+        # Get meta tags for this specific page
+        page_meta = generate_page_meta(
+            html_file.name, 
+            site['base_title'], 
+            site['base_desc'], 
+            site['base_keywords'],
+            site['shop_name'],
+            site['location']
+        )
+        if extracted:
+            page_meta = extracted_page_meta(page_meta, extracted, site_brand(site['base_title'], site['shop_name']), site['location'])
+        result['title'] = page_meta['title']
+        timings['meta'] += time.perf_counter() - clock
+        
+        # Read file; only head-only mode streams the body from it later,
+        # otherwise it's closed right away. The new page goes to a temp
+        # file that replaces the page once the source is closed.
+        clock = time.perf_counter()
+        with open(html_file, 'rb') as f:
+            data = read_page(f, options.head_only)
+            mtime = os.fstat(f.fileno()).st_mtime
+            if not options.head_only:
+                f.close()
+            try:
+                # Same bytes and same inputs as the last run we wrote
+                inputs = [options.ga_mode]
+                if options.fragments is not None:
+                    inputs.append('fragments')
+                if options.policy is not None:
+                    inputs.append(options.policy['hash'])
+                if options.variants is not None:
+                    inputs.append(options.variants['hash'])
+                if options.dimensions is not None:
+                    inputs.append(options.dimensions['hash'])
+                if options.minify:
+                    inputs.append(f"minify-{MINIFY_VERSION}")
+                state = {'hash': content_hash(data), 'meta': meta_hash(page_meta, site['ga_id'], options.engine, *inputs)}
+                # Same page bytes means the same fragments as last time
+                if options.fragments is not None and previous and previous.get('fragments'):
+                    state['fragments'] = {name: options.fragments.get(name, {}).get('hash') for name in previous['fragments']}
+                timings['read'] += time.perf_counter() - clock
+                if previous and all(previous.get(key) == value for key, value in state.items()):
+                    result['fragment'] = previous.get('fragment', False)
+                    result['status'] = 'skipped'
+                    return result
+                state['lastmod'] = page_lastmod(previous, state['hash'], mtime)
+                
+                if is_fragment(data):
+                    state['fragment'] = result['fragment'] = True
+                    result['status'] = 'skipped'
+                    result['state'] = state
+                    return result
+                
+                # Split off the head; pages without </head> are rewritten whole
+                clock = time.perf_counter()
+                head_end = HEAD_END_RE.search(data) if options.head_only else None
+                split = head_end.end() if head_end else len(data)
+                head = data[:split]
+                
+                # Update meta tags; the bytes engine only decodes the
+                # head (in its declared charset) for the stages below
+                charset = page_charset(head) if options.engine == 'bytes' else 'utf-8'
+                new_content = update_meta_tags(
+                    head if options.engine == 'bytes' else head.decode('utf-8'), 
+                    page_meta['title'], 
+                    page_meta['desc'], 
+                    page_meta['keywords'],
+                    site['ga_id'],
+                    options.engine,
+                    options.ga_mode,
+                    phases
+                )
+                step = time.perf_counter()
+                if options.engine == 'bytes':
+                    new_head = new_content
+                    text_stages = (options.fragments, options.variants, options.dimensions, options.policy)
+                    if options.minify or any(stage is not None for stage in text_stages):
+                        new_content = new_head.decode(charset)
+                        step = phase_done(phases, 'decode', step)
+                if options.fragments is not None:
+                    new_content, used = inline_fragments(new_content, options.fragments)
+                    state.pop('fragments', None)
+                    if used:
+                        state['fragments'] = used
+                    step = phase_done(phases, 'fragments', step)
+                if options.variants is not None:
+                    new_content, result['srcset'] = add_srcset(new_content, str(html_file), options.variants)
+                    step = phase_done(phases, 'srcset', step)
+                if options.dimensions is not None:
+                    new_content, result['dimensions'] = add_image_dimensions(new_content, str(html_file), options.dimensions)
+                    step = phase_done(phases, 'dimensions', step)
+                if options.policy is not None:
+                    new_content, result['hints'] = optimize_head(new_content, str(html_file), options.policy)
+                    step = phase_done(phases, 'hints', step)
+                if options.minify:
+                    before = len(new_content.encode(charset, 'xmlcharrefreplace'))
+                    new_content = minify_cached('html', new_content, options.minify_cache)
+                    step = phase_done(phases, 'minify', step)
+                if isinstance(new_content, str):
+                    new_head = new_content.encode(charset, 'xmlcharrefreplace')
+                if options.minify:
+                    result['minify'] = (before, len(new_head))
+                phase_done(phases, 'encode', step)
+                timings['rewrite'] += time.perf_counter() - clock
+                
+                # Write back only if something changed
+                if new_head == head:
+                    result['status'] = 'skipped'
+                elif options.dry_run:
+                    result['diff'] = head_diff(head_region(head), head_region(new_head), html_file.name)
+                    result['status'] = 'changed'
+                else:
+                    clock = time.perf_counter()
+                    hasher = new_hasher()
+                    hasher.update(new_head)
+                    chunks = [new_head]
+                    if split < len(data):
+                        chunks = chain(chunks, iter_body(f, split, hasher))
+                    tmp_path = write_temp_file(html_file, chunks, options.fsync == 'file')
+                    state['hash'] = hasher.hexdigest()
+                    timings['write'] += time.perf_counter() - clock
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+        
+        if tmp_path:
+            clock = time.perf_counter()
+            commit_temp_file(tmp_path, html_file)
+            tmp_path = None
+            state['lastmod'] = page_lastmod(previous, state['hash'], time.time())
+            result['status'] = 'changed'
+            timings['write'] += time.perf_counter() - clock
+        
+        result['state'] = state
+        
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        if tmp_path:
+            discard_temp_file(tmp_path)
+        result['cpu'] = time.thread_time() - cpu
+    
+    return result
+
+# Product pages: one static page per js/product.js entry, rendered from
+# product-detail.html into products/<slug>-<id>/index.html
+CATALOG_PATH = os.path.join('js', 'product.js')
+PRODUCT_TEMPLATE_PAGE = 'product-detail.html'
+PRODUCTS_DIR = 'products'
+PRODUCT_META = {
+    'title': '{product} – ₹{price} | {brand}',
+    'desc': 'Buy {product} online at {brand} for just ₹{price}. Fast delivery in {location}.',
+    'keywords': '{product}, buy {product} online, {categories}, {brand}, {location}'
+}
+PRODUCT_DESC_LENGTH = 155
+CATALOG_CHUNK = 64 * 1024
+# Longest JSON token that can be cut off without being a string ('-Infinity')
+CATALOG_TOKEN_MAX = 9
+CATALOG_SKIP_RE = re.compile(r'[\s,]*')
+SLUG_RE = re.compile(r'[^a-z0-9]+')
+HEAD_START_RE = re.compile(r'<head(\s[^>]*)?>', re.IGNORECASE)
+FRAGMENT_HREF_RE = re.compile(r'(\shref=["\'])#', re.IGNORECASE)
+CHARSET_META_RE = re.compile(r'<meta\s+charset=[^>]*>', re.IGNORECASE)
+ABSOLUTE_URL_RE = re.compile(r'https?://')
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+def iter_catalog(path):
+    """Yield products from a `const products = [...]` file one at a time
+
+    Reads in chunks and decodes one object at a time, so memory stays
+    at about one chunk however large the catalog is. An entry that
+    isn't JSON raises ValueError with its byte offset in the file.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        # Skip to the opening [ of the array; offset is the file's bytes before buf
+        offset = 0
+        buf = ''
+        while '[' not in buf:
+            offset += len(buf.encode('utf-8'))
+            buf = f.read(CATALOG_CHUNK)
+            if not buf:
+                return
+        pos = buf.index('[') + 1
+        
+        while True:
+            pos = CATALOG_SKIP_RE.match(buf, pos).end()
+            if buf.startswith(']', pos):
+                return
+            try:
+                product, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                # Only an entry cut off at the end of the buffer gets
+                # more text; anything else won't decode with more either
+                cut = e.msg.startswith('Unterminated string') or len(buf) - e.pos <= CATALOG_TOKEN_MAX
+                chunk = f.read(CATALOG_CHUNK) if cut else ''
+                if not chunk:
+                    if cut and (e.msg.startswith('Unterminated string') or not buf[e.pos:].strip()):
+                        at = offset + len(buf[:pos].encode('utf-8'))
+                        raise ValueError(f"Catalog {path} ends inside the entry at byte {at}") from None
+                    at = offset + len(buf[:e.pos].encode('utf-8'))
+                    raise ValueError(f"Catalog {path} is not JSON at byte {at}: {e.msg}") from None
+                offset += len(buf[:pos].encode('utf-8'))
+                buf = buf[pos:] + chunk
+                pos = 0
+                continue
+            yield product
+            pos = end
+
+def product_slug(product):
+    """URL slug for a product, unique thanks to the id"""
+    name = SLUG_RE.sub('-', str(product.get('name', '')).lower()).strip('-')
+    return f"{name}-{product['id']}" if name else str(product['id'])
+
+def product_page_path(out_dir, product):
+    """Where a product's page is written"""
+    return os.path.join(out_dir, product_slug(product), 'index.html')
+
+def absolute_url(url, site_url=None):
+    """Make a site-relative image/page URL absolute"""
+    if ABSOLUTE_URL_RE.match(url):
+        return url
+    if site_url:
+        return f"{site_url.rstrip('/')}/{url.lstrip('/')}"
+    return f"/{url.lstrip('/')}"
+
+def product_description(product, values):
+    """Description from descriptionHTML if present, else the template"""
+    text = HTML_TAG_RE.sub(' ', product.get('descriptionHTML') or '')
+    # One sentence per line in the catalog; keep them apart
+    lines = [' '.join(line.split()) for line in text.splitlines()]
+    text = ' '.join(line if line[-1] in '.!?' else f"{line}." for line in lines if line)
+    if not text:
+        return render_template(compile_template(PRODUCT_META['desc']), values)
+    return clip_description(text)
+
+def clip_description(text):
+    """text cut at a word to the description length"""
+    if len(text) <= PRODUCT_DESC_LENGTH:
+        return text
+    return text[:PRODUCT_DESC_LENGTH].rsplit(' ', 1)[0] + '…'
+
+def product_meta(product, brand, location):
+    """title/desc/keywords/image/price for one product"""
+    categories = product.get('categories') or [product.get('category')]
+    values = {
+        'product': str(product['name']),
+        'price': str(product.get('newPrice', '')),
+        'brand': brand,
+        'location': location,
+        'categories': ', '.join(str(category) for category in categories if category)
+    }
+    images = product.get('images') or []
+    return {
+        'title': render_template(compile_template(PRODUCT_META['title']), values),
+        'desc': product_description(product, values),
+        'keywords': render_template(compile_template(PRODUCT_META['keywords']), values),
+        'image': images[0] if images else None,
+        'price': product.get('newPrice')
+    }
+
+def render_product_page(template, product, meta, depth, page_url, site_url=None):
+    """product-detail.html with this product's meta filled in"""
+    safe_title = escape_html(meta['title'])
+    safe_desc = escape_html(meta['desc'])
+    
+    # Swap values in place; GA and everything else stays as in the template
+    html, found_title = TITLE_TAG_RE.subn(lambda m: f'<title>{safe_title}</title>', template, count=1)
+    html, found_desc = DESC_META_RE.subn(lambda m: f'<meta name="description" content="{safe_desc}">', html, count=1)
+    html, found_keywords = KEYWORDS_META_RE.subn(
+        lambda m: f'<meta name="keywords" content="{escape_html(meta["keywords"])}">', html, count=1)
+    
+    # The template's scripts build URLs at runtime (fetch('navbar.html'),
+    # catalog image paths, location.href = 'buynow.html'), so its markup
+    # can't simply be rewritten: <base> points them all at the site root.
+    # In-page #links are kept on this page.
+    html = FRAGMENT_HREF_RE.sub(lambda m: f'{m.group(1)}{page_url}#', html)
+    extra = [f'\n  <base href="{"../" * depth}">']
+    if not found_title:
+        extra.append(f'\n  <title>{safe_title}</title>')
+    if not found_desc:
+        extra.append(f'\n  <meta name="description" content="{safe_desc}">')
+    if not found_keywords:
+        extra.append(f'\n  <meta name="keywords" content="{escape_html(meta["keywords"])}">')
+    extra.append('\n  <meta property="og:type" content="product">')
+    extra.append(f'\n  <meta property="og:title" content="{safe_title}">')
+    extra.append(f'\n  <meta property="og:description" content="{safe_desc}">')
+    if meta['image']:
+        extra.append(f'\n  <meta property="og:image" content="{escape_html(absolute_url(meta["image"], site_url))}">')
+        if meta.get('image_size'):
+            extra.append(f'\n  <meta property="og:image:width" content="{meta["image_size"][0]}">')
+            extra.append(f'\n  <meta property="og:image:height" content="{meta["image_size"][1]}">')
+    if meta['price'] is not None:
+        extra.append(f'\n  <meta property="product:price:amount" content="{escape_html(str(meta["price"]))}">')
+        extra.append('\n  <meta property="product:price:currency" content="INR">')
+    extra.append(f'\n  <link rel="canonical" href="{escape_html(absolute_url(page_url, site_url))}">')
+    # script-detail.js reads the product from ?id=
+    extra.append(f"\n  <script>if (!location.search) history.replaceState(null, '', location.pathname + '?id={quote(str(product['id']))}');</script>")
+    
+    # Right after <head> (or its <meta charset>), so <base> applies to
+    # every link below it
+    head = HEAD_START_RE.search(html)
+    insert_at = head.end() if head else 0
+    charset = CHARSET_META_RE.match(html, CATALOG_SKIP_RE.match(html, insert_at).end())
+    if charset:
+        insert_at = charset.end()
+    return html[:insert_at] + ''.join(extra) + html[insert_at:]
+
+@lru_cache(maxsize=4)
+def load_product_template(path, template_hash):
+    """Template page text, read once per worker (keyed by content hash)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def process_product(product, previous, root, template_path, template_hash, brand, location, site_url=None, fsync=DEFAULT_FSYNC, dry_run=False, dimensions=None, minify=False, minify_cache=None):
+    """Render one product page if its inputs changed, returns a result dict
+
+    dimensions (see index_dimensions) gives og:image its width/height.
+    With minify the page is minified like the others (see minify_cached).
+    A page rendered to the same bytes as the file on disk isn't written.
+    """
+    result = {'name': None, 'path': None, 'title': None, 'status': 'failed', 'error': None, 'state': previous}
+    try:
+        if product.get('id') is None or not product.get('name'):
+            raise ValueError(f"catalog entry needs an id and a name: {json.dumps(product)[:60]}")
+        
+        page_path = product_page_path(os.path.join(root, PRODUCTS_DIR), product)
+        result['path'] = page_path
+        result['name'] = os.path.relpath(page_path, root)
+        
+        meta = product_meta(product, brand, location)
+        if dimensions and meta['image'] and not url_origin(meta['image']):
+            meta['image_size'] = dimensions.get(unquote(urlsplit(meta['image']).path.lstrip('/')))
+        
+        settings = [f"minify-{MINIFY_VERSION}"] if minify else []
+        inputs = json.dumps([product, template_hash, brand, location, site_url, meta.get('image_size'), *settings], sort_keys=True)
+        state = {'hash': None, 'meta': content_hash(inputs.encode('utf-8'))}
+        if previous and previous.get('meta') == state['meta'] and os.path.exists(page_path):
+            result['status'] = 'skipped'
+            return result
+        
+        result['title'] = meta['title']
+        
+        page_url = f"{PRODUCTS_DIR}/{product_slug(product)}/"
+        html = render_product_page(load_product_template(template_path, template_hash), product, meta, 2, page_url, site_url)
+        if minify:
+            html = minify_cached('html', html, minify_cache)
+        data = html.encode('utf-8')
+        state['hash'] = content_hash(data)
+        
+        # Same bytes as the page on disk (no state, or state lost): leave it
+        try:
+            with open(page_path, 'rb') as f:
+                current = f.read()
+                mtime = os.fstat(f.fileno()).st_mtime
+        except FileNotFoundError:
+            current = None
+        if data == current:
+            state['lastmod'] = page_lastmod(previous, state['hash'], mtime)
+            result['status'] = 'skipped'
+        else:
+            state['lastmod'] = page_lastmod(previous, state['hash'], time.time())
+            if not dry_run:
+                os.makedirs(os.path.dirname(page_path), exist_ok=True)
+                write_file_atomic(page_path, data, fsync == 'file')
+            result['status'] = 'changed'
+        result['state'] = state
+        
+    except Exception as e:
+        result['error'] = str(e)
+    
+    return result
+
+def generate_product_pages(directory, base_title, shop_name, location, workers=1, executor=None, state=None, site_url=None, fsync=DEFAULT_FSYNC, dry_run=False, sitemap=None, dimensions=None, minify=False, minify_cache=None, pages=None):
+    """Render a static page per catalog product, returns (ok, total)
+
+    Only products whose catalog entry (or the template page) changed
+    since the run recorded in state are re-rendered. Pages of products
+    that left the catalog are removed. If sitemap is a list, each
+    page's (path, lastmod) is appended to it. dimensions (see
+    index_dimensions) adds og:image width and height. With minify pages
+    are minified (see minify_cached). If pages is a dict, each page's
+    path gets its state entry, for precompress.
+    """
+    root = os.path.abspath(directory)
+    catalog = os.path.join(root, CATALOG_PATH)
+    template_path = os.path.join(root, PRODUCT_TEMPLATE_PAGE)
+    out_dir = os.path.join(root, PRODUCTS_DIR)
+    
+    if not os.path.exists(catalog) or not os.path.exists(template_path):
+        print(f"❌ Product pages need {CATALOG_PATH} and {PRODUCT_TEMPLATE_PAGE} in {directory}")
+        return 0, 0
+    
+    with open(template_path, 'rb') as f:
+        template_hash = content_hash(f.read())
+    
+    print(f"\n🛍️  Generating product pages from {CATALOG_PATH}...\n")
+    
+    job = partial(
+        process_product,
+        root=root,
+        template_path=template_path,
+        template_hash=template_hash,
+        brand=site_brand(base_title, shop_name),
+        location=location,
+        site_url=site_url,
+        fsync=fsync,
+        dry_run=dry_run,
+        dimensions=dimensions,
+        minify=minify,
+        minify_cache=minify_cache
+    )
+    
+    def tasks():
+        for product in iter_catalog(catalog):
+            previous = None
+            if state is not None and product.get('id') is not None:
+                previous = state.get(product_page_path(out_dir, product))
+            yield product, previous
+    
+    counts = {'changed': 0, 'skipped': 0, 'failed': 0}
+    seen = set()
+    changed_dirs = set()
+    for result in map_files(job, tasks(), executor, workers, STREAM_CHUNKSIZE):
+        counts[result['status']] += 1
+        if result['path']:
+            seen.add(result['path'])
+        
+        if sitemap is not None:
+            sitemap_entry(sitemap, root, result)
+        
+        if result['error']:
+            print(f"❌ Error generating {result['name'] or 'product'}: {result['error']}")
+            continue
+        if result['status'] == 'changed':
+            changed_dirs.add(os.path.dirname(result['path']))
+            print(f"{'📝' if dry_run else '✅'} {result['name']:<40} → {result['title'][:40]}")
+        if state is not None and result['state'] and not dry_run:
+            state[result['path']] = result['state']
+        if pages is not None and result['state']:
+            pages[result['path']] = result['state']
+    
+    # Drop pages of products that are gone from the catalog
+    removed = 0
+    if state is not None and not dry_run:
+        prefix = out_dir + os.sep
+        for key in [key for key in state if key.startswith(prefix) and key not in seen]:
+            try:
+                os.remove(key)
+                os.rmdir(os.path.dirname(key))
+            except OSError:
+                pass
+            del state[key]
+            removed += 1
+            print(f"🗑️  Removed {os.path.relpath(key, root)}")
+    
+    if fsync != 'none' and not dry_run:
+        fsync_dirs(changed_dirs | {out_dir})
+    
+    total = sum(counts.values())
+    print(f"\n🛍️  Product pages: {counts['changed']} {'would change' if dry_run else 'generated'}, "
+          f"{counts['skipped']} unchanged, {counts['failed']} failed, {removed} removed")
+    
+    return counts['changed'] + counts['skipped'], total
+
+# sitemap.xml: one <url> per page seen in the run. Past the protocol
+# limits it becomes a sitemap index over sitemap-<group>-<n>.xml files
+SITEMAP_NAME = 'sitemap.xml'
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+SITEMAP_MAX_URLS = 50000
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+SITEMAP_PART_RE = re.compile(r'sitemap-[\w-]+-\d+\.xml$')
+# Fragments loaded into other pages, not pages of their own
+SITEMAP_EXCLUDES = ('navbar.html', 'footer.html')
+
+def page_url(rel_path, site_url):
+    """Public URL of a page; index.html maps to its folder"""
+    path = rel_path.replace(os.sep, '/')
+    if path == 'index.html' or path.endswith('/index.html'):
+        path = path[:-len('index.html')]
+    return absolute_url(quote(path), site_url)
+
+def sitemap_entry(entries, root, result, exclude_re=None):
+    """Add a processed page's (path, lastmod) to entries unless excluded"""
+    if not result['path'] or not result['state'] or result.get('fragment'):
+        return
+    rel_path = os.path.relpath(result['path'], root)
+    if exclude_re and (exclude_re.match(rel_path) or exclude_re.match(os.path.basename(rel_path))):
+        return
+    lastmod = result['state'].get('lastmod')
+    if not lastmod:
+        # State from before sitemaps were tracked
+        try:
+            lastmod = page_lastmod(None, None, os.path.getmtime(result['path']))
+        except OSError:
+            return
+    entries.append((rel_path, lastmod))
+
+def sitemap_document(tag, items):
+    """A urlset or sitemapindex document from pre-rendered items"""
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n<{tag} xmlns="{SITEMAP_NS}">\n'
+            + ''.join(items) + f'</{tag}>\n').encode('utf-8')
+
+def sitemap_chunks(urls):
+    """Split (loc, lastmod) pairs into lists of <url> items within the limits"""
+    overhead = len(sitemap_document('urlset', []))
+    chunk, size = [], overhead
+    for loc, lastmod in urls:
+        item = f'  <url>\n    <loc>{escape_html(loc)}</loc>\n    <lastmod>{lastmod}</lastmod>\n  </url>\n'
+        item_size = len(item.encode('utf-8'))
+        if chunk and (len(chunk) >= SITEMAP_MAX_URLS or size + item_size > SITEMAP_MAX_BYTES):
+            yield chunk
+            chunk, size = [], overhead
+        chunk.append(item)
+        size += item_size
+    if chunk:
+        yield chunk
+
+def write_sitemap(directory, entries, site_url, fsync=DEFAULT_FSYNC):
+    """Write sitemap.xml (and parts) for entries, returns (files written, files total)
+
+    Files whose bytes would not change are left alone, so a run that
+    only touched a few pages rewrites only the part they live in.
+    Once split, product pages get parts of their own so catalog churn
+    doesn't reshuffle the regular pages.
+    """
+    root = os.path.abspath(directory)
+    groups = {}
+    for rel_path, lastmod in sorted(entries):
+        group = 'products' if rel_path.startswith(PRODUCTS_DIR + os.sep) else 'pages'
+        groups.setdefault(group, []).append((page_url(rel_path, site_url), lastmod))
+    
+    documents = {}
+    single = list(islice(sitemap_chunks(chain.from_iterable(groups.values())), 2))
+    if len(single) <= 1:
+        documents[SITEMAP_NAME] = sitemap_document('urlset', single[0] if single else [])
+    else:
+        index = []
+        for group in sorted(groups):
+            parts = list(sitemap_chunks(groups[group]))
+            start = 0
+            for number, part in enumerate(parts, 1):
+                name = f"sitemap-{group}-{number}.xml"
+                documents[name] = sitemap_document('urlset', part)
+                lastmod = max(lastmod for _, lastmod in groups[group][start:start + len(part)])
+                start += len(part)
+                index.append(f'  <sitemap>\n    <loc>{escape_html(absolute_url(name, site_url))}</loc>\n'
+                             f'    <lastmod>{lastmod}</lastmod>\n  </sitemap>\n')
+        documents[SITEMAP_NAME] = sitemap_document('sitemapindex', index)
+    
+    written = 0
+    for name, data in documents.items():
+        path = os.path.join(root, name)
+        try:
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    continue
+        except FileNotFoundError:
+            pass
+        write_file_atomic(path, data, fsync == 'file')
+        written += 1
+    
+    # Parts left over from a bigger sitemap
+    with os.scandir(root) as it:
+        for entry in it:
+            if SITEMAP_PART_RE.match(entry.name) and entry.name not in documents:
+                os.remove(entry.path)
+                written += 1
+    
+    if written and fsync != 'none':
+        fsync_dirs({root})
+    
+    return written, len(documents)
+
+# --profile: wall and CPU time per stage and per page, the slowest pages
+# and peak memory. Records go to a JSON Lines file (one per page, per
+# stage and per run, appended so nightly runs build a history) and/or a
+# Prometheus textfile for node_exporter's textfile collector. Stage CPU
+# is the main process's; worker CPU is counted per page
+PROFILE_TOP = 10
+PROM_PREFIX = 'meta_bot'
+
+def peak_rss_bytes():
+    """Peak RSS of this process or its largest finished worker, None where unknown"""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux reports KB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def new_profile(path=None, prom_path=None, phases=False, top=PROFILE_TOP):
+    """Collector for one run's timings, see record_stage/record_page/finish_profile"""
+    return {
+        'run': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'out': open(path, 'a', encoding='utf-8') if path else None,
+        'prom': prom_path,
+        'phases': phases,
+        'top': top,
+        'clock': stage_clock(),
+        'stages': {},
+        'pages': Counter(),
+        'page_stages': {},
+        'page_cpu': 0.0,
+        'page_phases': {},
+        'slowest': []
+    }
+
+def stage_clock():
+    """Start of a timed stage, for record_stage"""
+    return time.perf_counter(), time.process_time()
+
+def record_stage(profile, name, clock):
+    """Add the wall and CPU time since clock to a stage (no-op without a profile)"""
+    if profile is None:
+        return
+    stage = profile['stages'].setdefault(name, {'wall': 0.0, 'cpu': 0.0})
+    stage['wall'] += time.perf_counter() - clock[0]
+    stage['cpu'] += time.process_time() - clock[1]
+
+def record_page(profile, root, result):
+    """Add one process_file result to the profile and its JSON Lines file"""
+    wall = sum(result['timings'].values())
+    path = os.path.relpath(result['path'], root)
+    profile['pages'][result['status']] += 1
+    profile['page_cpu'] += result['cpu']
+    for stage, seconds in result['timings'].items():
+        profile['page_stages'][stage] = profile['page_stages'].get(stage, 0.0) + seconds
+    for phase, seconds in (result.get('phases') or {}).items():
+        profile['page_phases'][phase] = profile['page_phases'].get(phase, 0.0) + seconds
+    
+    if profile['out']:
+        record = {'type': 'page', 'run': profile['run'], 'site': root, 'path': path, 'status': result['status'],
+                  'wall': round(wall, 6), 'cpu': round(result['cpu'], 6),
+                  'stages': {stage: round(seconds, 6) for stage, seconds in result['timings'].items()}}
+        if result.get('phases'):
+            record['phases'] = {phase: round(seconds, 6) for phase, seconds in result['phases'].items()}
+        profile['out'].write(json.dumps(record) + '\n')
+    
+    # Only the slowest few are kept, however many pages there are
+    item = (wall, root, path)
+    if len(profile['slowest']) < profile['top']:
+        heapq.heappush(profile['slowest'], item)
+    elif profile['top']:
+        heapq.heappushpop(profile['slowest'], item)
+
+def prom_metric(lines, name, help_text, samples):
+    """Append one gauge with its (labels, value) samples in Prometheus text format"""
+    lines.append(f"# HELP {PROM_PREFIX}_{name} {help_text}")
+    lines.append(f"# TYPE {PROM_PREFIX}_{name} gauge")
+    for labels, value in samples:
+        label_text = ','.join(f'{key}="{label}"' for key, label in labels.items())
+        lines.append(f"{PROM_PREFIX}_{name}{{{label_text}}} {value}" if label_text else f"{PROM_PREFIX}_{name} {value}")
+
+def finish_profile(profile):
+    """Write the run's stage and summary records, the textfile and a console report"""
+    wall = time.perf_counter() - profile['clock'][0]
+    cpu = time.process_time() - profile['clock'][1]
+    peak = peak_rss_bytes()
+    slowest = sorted(profile['slowest'], reverse=True)
+    
+    if profile['out']:
+        for name, stage in profile['stages'].items():
+            profile['out'].write(json.dumps({'type': 'stage', 'run': profile['run'], 'stage': name,
+                                             'wall': round(stage['wall'], 6), 'cpu': round(stage['cpu'], 6)}) + '\n')
+        profile['out'].write(json.dumps({
+            'type': 'run', 'run': profile['run'], 'wall': round(wall, 6), 'cpu': round(cpu, 6),
+            'page_cpu': round(profile['page_cpu'], 6), 'peak_rss_bytes': peak, 'pages': dict(profile['pages']),
+            'page_stages': {stage: round(seconds, 6) for stage, seconds in profile['page_stages'].items()},
+            'page_phases': {phase: round(seconds, 6) for phase, seconds in profile['page_phases'].items()},
+            'slowest': [{'site': root, 'path': path, 'wall': round(seconds, 6)} for seconds, root, path in slowest]
+        }) + '\n')
+        profile['out'].close()
+    
+    if profile['prom']:
+        lines = []
+        prom_metric(lines, 'run_seconds', "Time taken by the last run", [({'kind': 'wall'}, wall), ({'kind': 'cpu'}, cpu + profile['page_cpu'])])
+        prom_metric(lines, 'stage_seconds', "Time per stage of the last run",
+                    [({'stage': name, 'kind': kind}, stage[kind]) for name, stage in profile['stages'].items() for kind in ('wall', 'cpu')])
+        prom_metric(lines, 'page_stage_seconds', "Wall time per page stage, summed over pages",
+                    [({'stage': stage}, seconds) for stage, seconds in profile['page_stages'].items()])
+        prom_metric(lines, 'page_cpu_seconds', "CPU time spent on pages, all workers", [({}, profile['page_cpu'])])
+        if profile['page_phases']:
+            prom_metric(lines, 'page_phase_seconds', "Wall time per rewrite phase, summed over pages",
+                        [({'phase': phase}, seconds) for phase, seconds in profile['page_phases'].items()])
+        prom_metric(lines, 'pages', "Pages by outcome in the last run",
+                    [({'status': status}, profile['pages'][status]) for status in ('changed', 'skipped', 'failed')])
+        if slowest:
+            prom_metric(lines, 'slowest_page_seconds', "Wall time of the slowest page", [({}, slowest[0][0])])
+        if peak is not None:
+            prom_metric(lines, 'peak_rss_bytes', "Peak resident memory of the last run", [({}, peak)])
+        prom_metric(lines, 'last_run_timestamp_seconds', "When the last run finished", [({}, round(time.time()))])
+        write_file_atomic(profile['prom'], ('\n'.join(lines) + '\n').encode('utf-8'))
+    
+    print("\n" + "="*60)
+    print("⏱️  PROFILE")
+    print("="*60)
+    print(f"Run:    {wall:.3f}s wall, {cpu:.3f}s CPU here + {profile['page_cpu']:.3f}s on pages"
+          + (f", peak RSS {peak / 1024 / 1024:.1f} MB" if peak is not None else ''))
+    for name, stage in profile['stages'].items():
+        print(f"   {name:<12} {stage['wall']:8.3f}s wall {stage['cpu']:8.3f}s CPU")
+    if profile['page_stages']:
+        print("Pages:  " + ', '.join(f"{stage} {seconds:.3f}s" for stage, seconds in profile['page_stages'].items()))
+    if profile['page_phases']:
+        print("Phases: " + ', '.join(f"{phase} {seconds * 1000:.1f}ms" for phase, seconds in
+                                      sorted(profile['page_phases'].items(), key=lambda item: -item[1])))
+    if slowest:
+        print(f"Slowest {len(slowest)}:")
+        for seconds, root, path in slowest:
+            print(f"   {seconds * 1000:8.2f} ms  {os.path.join(root, path)}")
+    print("="*60 + "\n")
+
+# Settings of a run, one namespace shared by process_html_files and
+# process_file (see run_options for the command line). The last group is
+# filled in per site by process_html_files for process_file
+RUN_DEFAULTS = {
+    'engine': DEFAULT_ENGINE,
+    'ga_mode': DEFAULT_GA_MODE,
+    'workers': 1,
+    'backend': DEFAULT_BACKEND,
+    'recursive': False,
+    'include': DEFAULT_INCLUDES,
+    'exclude': DEFAULT_EXCLUDES,
+    'fsync': DEFAULT_FSYNC,
+    'head_only': False,
+    'dry_run': False,
+    'products': False,
+    'site_url': None,
+    'sitemap': False,
+    'sitemap_exclude': SITEMAP_EXCLUDES,
+    'inline': False,
+    'hints': None,
+    'minify': False,
+    'minify_cache': MINIFY_CACHE_DIR,
+    'precompress_pages': False,
+    'precompress_assets': False,
+    'compress_min_bytes': COMPRESS_MIN_BYTES,
+    'images': False,
+    'srcset': False,
+    'image_widths': IMAGE_WIDTHS,
+    'image_formats': IMAGE_FORMATS,
+    'image_quality': IMAGE_QUALITY,
+    'image_max_bytes': OVERSIZED_BYTES,
+    'img_dimensions': False,
+    'dimension_index': DIMENSION_INDEX,
+    'extract': False,
+    'term_index': TERM_INDEX,
+    'site': None,
+    'fragments': None,
+    'policy': None,
+    'variants': None,
+    'dimensions': None,
+    'phases': False
+}
+
+def new_options(options=None, **changes):
+    """Run options namespace: a copy of options (RUN_DEFAULTS if None) with changes applied"""
+    values = dict(RUN_DEFAULTS if options is None else vars(options))
+    unknown = set(changes) - set(values)
+    if unknown:
+        raise TypeError(f"Unknown run option(s): {', '.join(sorted(unknown))}")
+    values.update(changes)
+    return SimpleNamespace(**values)
+
+def process_html_files(directory, base_title, base_desc, base_keywords, shop_name, location, ga_id=None, options=None, executor=None, confirm=True, state=None, changes=None, files=None, profile=None):
+    """Process all HTML files in directory, returns (updated, total)
+
+    options is a run options namespace (see new_options, None for the
+    defaults); the settings below are its fields.
+
+    state maps file paths to hashes from the last run (see load_state)
+    and is updated in place; files whose output would not change are
+    skipped without rewriting.
+
+    With recursive=True the tree is walked lazily and files are handed
+    to the workers as they are found, so nothing is listed up front.
+    files (paths) replaces the scan with just those pages (watch mode).
+
+    With dry_run=True nothing is written and each page that would
+    change is appended to changes (file, title and head diff).
+
+    With products=True a page per js/product.js entry is rendered into
+    products/ afterwards (see generate_product_pages); that folder is
+    left out of the rewrite.
+
+    With sitemap=True sitemap.xml is brought up to date with every page
+    seen in the run (see write_sitemap), except sitemap_exclude matches.
+
+    Fragment files (navbar.html, footer.html) are never rewritten. With
+    inline=True each page gets a copy of the fragments it fetches (see
+    inline_fragments); that needs whole pages, so head_only is ignored.
+
+    hints is the path of a resource hint policy (see optimize_head);
+    each rewritten page's estimated blocking bytes are reported.
+
+    With minify=True pages are minified on write, reusing results from
+    minify_cache (None to disable, not used by dry runs); savings are
+    reported per file.
+
+    With precompress_pages=True every page gets .br/.gz sidecars (see
+    precompress), and css/js files too with precompress_assets=True.
+
+    With images=True images/ gets responsive variants first (see
+    optimize_images) and a report of bytes saved and oversized images.
+    With srcset=True <img> tags are pointed at the variants, and with
+    img_dimensions=True they get width/height from the image headers
+    (see index_dimensions, cached in dimension_index, None to disable).
+    Both need whole pages, so head_only is ignored. Product pages always
+    get og:image sizes.
+
+    With extract=True pages without a page template (other than the
+    home page) get keywords and a description from their text, see
+    extract_meta. Term counts of every page in the site are cached in
+    term_index (None to disable), even when files limits the rewrite.
+
+    profile (see new_profile) collects stage and per-page timings.
+    """
+    # Settings below are adjusted for this site only
+    options = new_options(options)
+    root = os.path.abspath(directory)
+    if options.products:
+        options.exclude = tuple(options.exclude) + (PRODUCTS_DIR,)
+    html_files = iter_html_files(root, options.recursive, options.include, options.exclude) if files is None else iter(files)
+    chunksize = STREAM_CHUNKSIZE
+    
+    if options.recursive:
+        print(f"\n📁 Scanning {root} recursively")
+        print("\n" + "="*60)
+        
+        if confirm and not options.dry_run and not yes_no("Update all HTML files under this folder? (yes/no): "):
+            print("\n❌ Cancelled!")
+            return 0, 0
+    else:
+        clock = stage_clock()
+        html_files = list(html_files)
+        record_stage(profile, 'scan', clock)
+        
+        if not html_files:
+            print(f"\n❌ No HTML files found in {directory}!")
+            return 0, 0
+        
+        print(f"\n📁 Found {len(html_files)} HTML file(s):\n")
+        for f in html_files:
+            print(f"   • {f.name}")
+        
+        print("\n" + "="*60)
+        
+        if confirm and not options.dry_run and not yes_no("Update all these files? (yes/no): "):
+            print("\n❌ Cancelled!")
+            return 0, len(html_files)
+        
+        # Batch small files together to keep pickling overhead down
+        chunksize = max(1, len(html_files) // (resolve_workers(options.workers) * 4))
+    
+    policy = None
+    if options.hints:
+        try:
+            policy = load_hints_policy(options.hints, root)
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"\n❌ Cannot load hint policy: {e}")
+            return 0, 0
+        print(f"\n⚡ Resource hints from {options.hints}")
+    
+    fragments = None
+    if options.inline:
+        fragments = load_fragments(root)
+        print(f"\n🧩 Inlining {len(fragments)} fragment(s): {', '.join(sorted(fragments)) or 'none found'}")
+        if options.head_only:
+            print("⚠️  Inlining rewrites the page body, reading whole pages instead of --head-only")
+            options.head_only = False
+    
+    if (options.srcset or options.img_dimensions) and options.head_only:
+        print("⚠️  <img> tags are in the page body, reading whole pages instead of --head-only")
+        options.head_only = False
+    
+    dimensions = None
+    if options.img_dimensions or options.products or options.srcset:
+        clock = stage_clock()
+        index = load_dimension_index(options.dimension_index) if options.dimension_index else {}
+        sizes, read, index_changes = index_dimensions(root, index)
+        if index_changes and options.dimension_index and not options.dry_run:
+            save_dimension_index(index, options.dimension_index)
+        print(f"\n📐 Image sizes: {len(sizes)} image(s), {read} read")
+        dimensions = {'root': root, 'images': sizes, 'hash': content_hash(json.dumps(sorted(sizes.items())).encode('utf-8'))}
+        record_stage(profile, 'dimensions', clock)
+    
+    if state is not None:
+        tasks = ((f, state.get(str(f))) for f in html_files)
+    else:
+        tasks = ((f, None) for f in html_files)
+    
+    if options.sitemap and not options.site_url:
+        print("❌ The sitemap needs the public site URL (--site-url), skipping it")
+        options.sitemap = False
+    sitemap_entries = [] if options.sitemap else None
+    sitemap_exclude_re = compile_globs(options.sitemap_exclude)
+    
+    counts = {'changed': 0, 'skipped': 0, 'failed': 0}
+    blocking = {'before': 0, 'after': 0, 'pages': 0}
+    minified = {'before': 0, 'after': 0, 'pages': 0}
+    srcset_tags = 0
+    sized_tags = 0
+    compress_pages = {}
+    changed_dirs = set()
+    # Reuse the caller's pool if given (batch mode), otherwise own one
+    own_executor = executor is None
+    if own_executor:
+        executor = make_executor(options.workers, options.backend)
+    product_counts = (0, 0)
+    try:
+        # Variants first so the pages can point at them
+        manifest = None
+        if options.images:
+            clock = stage_clock()
+            manifest = optimize_images(
+                root, iter_html_files(root),
+                widths=options.image_widths,
+                formats=options.image_formats,
+                quality=options.image_quality,
+                max_bytes=options.image_max_bytes,
+                workers=options.workers,
+                executor=executor,
+                fsync=options.fsync,
+                dry_run=options.dry_run
             )
+            record_stage(profile, 'images', clock)
+        
+        extracted = None
+        if options.extract:
+            clock = stage_clock()
+            index = load_term_index(options.term_index) if options.term_index else {}
+            corpus = html_files if files is None and not options.recursive else iter_html_files(root, options.recursive, options.include, options.exclude)
+            pages, read, dropped = index_terms(root, corpus, index, options.workers, executor)
+            if (read or dropped) and options.term_index and not options.dry_run:
+                save_term_index(index, options.term_index)
+            home = os.path.join(root, 'index.html')
+            extracted = {path: meta for path, meta in extract_meta(pages).items()
+                         if path != home and os.path.basename(path) not in page_templates()}
+            print(f"\n🔤 Extracted meta for {len(extracted)} page(s) from {len(pages)} page(s) of text, {read} read"
+                  f" ({'NumPy' if optional_module('numpy') is not None else 'pure Python'})")
+            record_stage(profile, 'extract', clock)
+            tasks = ((f, previous, extracted.get(str(f))) for f, previous in tasks)
+        variants = None
+        if options.srcset:
+            variants = srcset_images(load_image_manifest(root) if manifest is None else manifest, root, dimensions['images'])
+            print(f"\n🖼️  srcset for {len(variants['images'])} image(s) with {SRCSET_FORMAT} variants")
+        
+        print("\n🔍 Dry run, nothing will be written...\n" if options.dry_run else "\n🚀 Processing files...\n")
+        
+        job = partial(process_file, new_options(
+            options,
+            site={'base_title': base_title, 'base_desc': base_desc, 'base_keywords': base_keywords,
+                  'shop_name': shop_name, 'location': location, 'ga_id': ga_id},
+            # A dry run writes nothing, cache entries included
+            minify_cache=None if options.dry_run else options.minify_cache,
+            fragments=fragments,
+            policy=policy,
+            variants=variants,
+            dimensions=dimensions if options.img_dimensions else None,
+            phases=bool(profile and profile['phases'])
+        ))
+        
+        clock = stage_clock()
+        for result in map_files(job, tasks, executor, options.workers, chunksize):
+            counts[result['status']] += 1
+            if profile is not None:
+                record_page(profile, root, result)
+            if state is not None and result['state']:
+                state[result['path']] = result['state']
+            if result['status'] == 'changed':
+                changed_dirs.add(os.path.dirname(result['path']))
+            if options.sitemap:
+                sitemap_entry(sitemap_entries, root, result, sitemap_exclude_re)
+            if options.precompress_pages and not result['error']:
+                compress_pages[result['path']] = result['state']
+            
+            name = os.path.relpath(result['path'], root) if options.recursive else result['name']
+            if result['error']:
+                print(f"❌ Error updating {name}: {result['error']}")
+            elif result['fragment']:
+                print(f"🧩 {name:<25} (fragment, left as is)")
+            elif result['status'] == 'skipped':
+                print(f"⏭️  {name:<25} (unchanged)")
+            elif options.dry_run:
+                print(f"📝 {name:<25} → {result['title'][:50]} (would change)")
+                if changes is not None:
+                    changes.append({
+                        'site': root,
+                        'file': os.path.relpath(result['path'], root),
+                        'title': result['title'],
+                        'diff': ''.join(result['diff'])
+                    })
+            else:
+                print(f"✅ {name:<25} → {result['title'][:50]}")
+            
+            report = result.get('hints')
+            if report and not result['error']:
+                blocking['pages'] += 1
+                blocking['before'] += report['before']
+                blocking['after'] += report['after']
+                unknown = f" (+{report['unknown']} of unknown size)" if report['unknown'] else ''
+                print(f"   ⚡ blocking ~{report['before'] / 1024:.1f} KB → {report['after'] / 1024:.1f} KB{unknown}, {report['added']} hint(s)")
+            
+            if result.get('srcset') and not result['error']:
+                srcset_tags += result['srcset']
+                print(f"   🖼️  srcset on {result['srcset']} <img> tag(s)")
+            if result.get('dimensions') and not result['error']:
+                sized_tags += result['dimensions']
+                print(f"   📐 width/height on {result['dimensions']} <img> tag(s)")
             
-            # Update meta tags
-            new_content = update_meta_tags(
-                content, 
-                page_meta['title'], 
-                page_meta['desc'], 
-                page_meta['keywords'],
-                ga_id
+            if result.get('minify') and not result['error']:
+                before, after = result['minify']
+                minified['pages'] += 1
+                minified['before'] += before
+                minified['after'] += after
+                print(f"   🗜️  {before / 1024:.1f} KB → {after / 1024:.1f} KB (-{before - after:,} bytes)")
+        record_stage(profile, 'pages', clock)
+        
+        if options.products:
+            clock = stage_clock()
+            product_counts = generate_product_pages(
+                root, base_title, shop_name, location,
+                workers=options.workers,
+                executor=executor,
+                state=state,
+                site_url=options.site_url,
+                fsync=options.fsync,
+                dry_run=options.dry_run,
+                sitemap=sitemap_entries,
+                dimensions=dimensions['images'],
+                minify=options.minify,
+                # A dry run writes nothing, cache entries included
+                minify_cache=None if options.dry_run else options.minify_cache,
+                pages=compress_pages if options.precompress_pages else None
+            )
+            record_stage(profile, 'products', clock)
+        
+        if options.sitemap and not options.dry_run:
+            clock = stage_clock()
+            written, parts = write_sitemap(root, sitemap_entries, options.site_url, options.fsync)
+            print(f"\n🗺️  Sitemap: {len(sitemap_entries)} URL(s) in {parts} file(s), {written} updated")
+            record_stage(profile, 'sitemap', clock)
+        
+        if options.precompress_pages and not options.dry_run:
+            clock = stage_clock()
+            precompress(
+                root, compress_pages,
+                state=state,
+                assets=options.precompress_assets,
+                min_bytes=options.compress_min_bytes,
+                workers=options.workers,
+                executor=executor,
+                fsync=options.fsync
             )
+            record_stage(profile, 'precompress', clock)
+    finally:
+        if own_executor and executor:
+            executor.shutdown()
+        if options.fsync != 'none':
+            fsync_dirs(changed_dirs)
+    
+    total = sum(counts.values())
+    if not total:
+        print(f"❌ No HTML files found in {directory}!")
+        return 0, 0
+    
+    updated = counts['changed'] + counts['skipped']
+    print("\n" + "="*60)
+    if options.dry_run:
+        print(f"🔍 Dry run: {counts['changed']}/{total} files would change")
+    else:
+        print(f"✅ Successfully updated {updated}/{total} files!")
+    print(f"   Changed: {counts['changed']}  Skipped: {counts['skipped']}  Failed: {counts['failed']}")
+    if blocking['pages']:
+        print(f"   ⚡ Blocking bytes over {blocking['pages']} page(s): ~{blocking['before'] / 1024:.1f} KB → {blocking['after'] / 1024:.1f} KB")
+    if srcset_tags:
+        print(f"   🖼️  srcset added to {srcset_tags} <img> tag(s)")
+    if sized_tags:
+        print(f"   📐 width/height added to {sized_tags} <img> tag(s)")
+    if minified['pages']:
+        saved = minified['before'] - minified['after']
+        print(f"   🗜️  Minified {minified['pages']} page(s): {minified['before'] / 1024:.1f} KB → {minified['after'] / 1024:.1f} KB"
+              f" (-{saved:,} bytes, {saved * 100 / max(minified['before'], 1):.1f}%)")
+    print("="*60 + "\n")
+    
+    return updated + product_counts[0], total + product_counts[1]
+
+# --watch: after the first run the bot stays up with templates, state
+# and the worker pool warm, and redoes only what a change affects (see
+# watch_targets). Linux gets inotify through ctypes, elsewhere the tree
+# is polled every WATCH_POLL_INTERVAL seconds. Bursts of events (an
+# editor's write + rename) are merged until the tree has been quiet for
+# WATCH_DEBOUNCE seconds
+WATCH_DEBOUNCE = 0.03
+WATCH_POLL_INTERVAL = 0.25
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+INOTIFY_EVENT = struct.Struct('iIII')
+
+def walk_tree(root, skip):
+    """(folder, file names) for every folder under root that skip() lets through"""
+    for path, dirs, names in os.walk(root):
+        dirs[:] = [name for name in dirs if not skip(os.path.join(path, name))]
+        yield path, names
+
+def inotify_watcher(root, skip):
+    """(wait, close) over inotify, None where it isn't available
+
+    wait(timeout) returns the paths changed since the last call (empty
+    after timeout seconds, None when events were lost).
+    """
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    
+    folders = {}
+    
+    def add(directory):
+        found = set()
+        for path, names in walk_tree(directory, skip):
+            wd = libc.inotify_add_watch(fd, os.fsencode(path), WATCH_MASK)
+            if wd >= 0:
+                folders[wd] = path
+            found.update(os.path.join(path, name) for name in names)
+        return found
+    
+    def wait(timeout):
+        ready, _, _ = select.select([fd], [], [], timeout)
+        if not ready:
+            return set()
+        data = os.read(fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if wd not in folders or not name:
+                continue
+            path = os.path.join(folders[wd], name)
+            if mask & IN_ISDIR:
+                # A new folder's files may predate its watch
+                if mask & (IN_CREATE | IN_MOVED_TO) and not skip(path):
+                    changed.update(add(path))
+            elif not mask & IN_CREATE:
+                changed.add(path)
+        return changed
+    
+    add(root)
+    return wait, lambda: os.close(fd)
+
+def polling_watcher(root, skip, interval=WATCH_POLL_INTERVAL):
+    """(wait, close) comparing file mtimes and sizes every interval seconds"""
+    def snapshot():
+        files = {}
+        for path, names in walk_tree(root, skip):
+            for name in names:
+                try:
+                    info = os.stat(os.path.join(path, name))
+                except OSError:
+                    continue
+                files[os.path.join(path, name)] = (info.st_mtime_ns, info.st_size)
+        return files
+    
+    seen = snapshot()
+    
+    def wait(timeout):
+        nonlocal seen
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(interval if deadline is None else max(0, min(interval, deadline - time.monotonic())))
+            current = snapshot()
+            changed = {path for path in current.keys() | seen.keys() if current.get(path) != seen.get(path)}
+            seen = current
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+    
+    return wait, lambda: None
+
+def watch_changes(root, skip, debounce=WATCH_DEBOUNCE, poll=False):
+    """Yield sets of changed paths under root, one per burst (None: rescan everything)"""
+    watcher = None if poll else inotify_watcher(root, skip)
+    if watcher is None:
+        print(f"👀 Polling for changes every {WATCH_POLL_INTERVAL}s")
+        watcher = polling_watcher(root, skip)
+    wait, close = watcher
+    try:
+        while True:
+            batch = wait(None)
+            while batch:
+                more = wait(debounce)
+                if not more:
+                    batch = None if more is None else batch
+                    break
+                batch |= more
+            if batch is None or batch:
+                yield batch
+    finally:
+        close()
+
+def watch_targets(changed, root, state, options):
+    """What a burst of changes means for the site
+
+    Returns {'all', 'pages', 'products', 'assets'}: a full run, pages
+    to redo (edited pages, and with inlining the pages using an edited
+    fragment), product pages (catalog or template edited) and css/js
+    files to recompress.
+    """
+    targets = {'all': changed is None, 'pages': set(), 'products': False, 'assets': set()}
+    if changed is None:
+        return targets
+    
+    include_re = compile_globs(options.include)
+    exclude_re = compile_globs(options.exclude)
+    hints = os.path.abspath(options.hints) if options.hints else None
+    image_stages = options.images or options.srcset or options.img_dimensions
+    for path in changed:
+        rel = os.path.relpath(path, root).replace(os.sep, '/')
+        name = os.path.basename(path)
+        parts = rel.split('/')
+        if any(part.startswith('.') for part in parts):
+            # Including the bot's own temp files
+            continue
+        if path == hints:
+            targets['all'] = True
+        elif rel == CATALOG_PATH.replace(os.sep, '/'):
+            targets['products'] = options.products
+        elif parts[0] == IMAGES_DIR:
+            targets['all'] = targets['all'] or image_stages
+        elif include_re.match(name) and (options.recursive or len(parts) == 1) and \
+                not (exclude_re and any(exclude_re.match(part) for part in parts)):
+            if rel == PRODUCT_TEMPLATE_PAGE:
+                targets['products'] = options.products
+            if options.inline and (state.get(path) or {}).get('fragment'):
+                targets['pages'].update(page for page, entry in state.items() if name in (entry.get('fragments') or {}))
+            targets['pages'].add(path)
+        elif options.precompress_assets and any(parts[0] == folder and fnmatch.fnmatch(name, pattern) for folder, pattern in ASSET_DIRS):
+            targets['assets'].add(path)
+    return targets
+
+def watch_site(directory, site, options, state, state_file=None, poll=False):
+    """Keep the site up to date as files change, until Ctrl-C
+
+    site holds the positional process_html_files arguments after the
+    directory; options the run options (see new_options). state is
+    filled by the first full run and keeps the bot's own writes from
+    triggering more work.
+    The sitemap is only redone by full runs, and once more on exit.
+    """
+    root = os.path.abspath(directory)
+    image_stages = options.images or options.srcset or options.img_dimensions
+    skipped = [pattern for pattern in options.exclude if not (image_stages and pattern == IMAGES_DIR)]
+    if options.products:
+        skipped.append(PRODUCTS_DIR)
+    if image_stages:
+        skipped.append(f"{IMAGES_DIR}/{IMAGE_OUT_DIR}")
+    skip_re = compile_globs(skipped)
+    
+    def skip(path):
+        name = os.path.basename(path)
+        return name.startswith('.') or bool(skip_re and (skip_re.match(name) or skip_re.match(os.path.relpath(path, root).replace(os.sep, '/'))))
+    
+    # Targeted runs see a few files; the pool stays up between them
+    targeted = new_options(options, sitemap=False, images=False, precompress_assets=False)
+    executor = make_executor(options.workers, options.backend)
+    print(f"\n👀 Watching {root} for changes (Ctrl-C to stop)")
+    try:
+        for changed in watch_changes(root, skip, poll=poll):
+            started = time.perf_counter()
+            targets = watch_targets(changed, root, state, options)
             
-            # Write back
-            with open(html_file, 'w', encoding='utf-8') as f:
-                f.write(new_content)
+            for path in [path for path in targets['pages'] if not os.path.exists(path)]:
+                targets['pages'].discard(path)
+                state.pop(path, None)
+                print(f"🗑️  {os.path.relpath(path, root)} removed")
+            if targets['products']:
+                # The template page is processed first, then the products
+                targets['pages'].add(os.path.join(root, PRODUCT_TEMPLATE_PAGE))
             
-            print(f"✅ {html_file.name:<25} → {page_meta['title'][:50]}")
-            updated += 1
+            if targets['all']:
+                process_html_files(root, *site, options, confirm=False, state=state, executor=executor)
+            elif targets['pages']:
+                process_html_files(root, *site, new_options(targeted, products=targets['products']), confirm=False, state=state,
+                                   executor=executor, files=sorted(map(Path, targets['pages'])))
+            if targets['assets'] and not targets['all']:
+                precompress(root, {}, state=state, assets=True, min_bytes=options.compress_min_bytes,
+                            workers=options.workers, executor=executor, fsync=options.fsync)
+            if not (targets['all'] or targets['pages'] or targets['assets']):
+                continue
             
-        except Exception as e:
-            print(f"❌ Error updating {html_file.name}: {str(e)}")
+            if state_file:
+                save_state(state_file, state)
+            print(f"⚡ Up to date {(time.perf_counter() - started) * 1000:.0f} ms after the change settled\n")
+    except KeyboardInterrupt:
+        print("\n\n👋 Stopped watching")
+    finally:
+        if executor:
+            executor.shutdown()
     
+    if options.sitemap:
+        process_html_files(root, *site, new_options(targeted, sitemap=True, products=options.products), confirm=False, state=state)
+        if state_file:
+            save_state(state_file, state)
+
+# Columns/keys understood in a manifest entry
+MANIFEST_FIELDS = ('directory', 'category', 'title', 'desc', 'keywords', 'name', 'location', 'ga_id', 'ga_mode', 'site_url', 'hints')
+
+def load_manifest(path):
+    """Load site entries from a JSON, YAML or CSV manifest"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if suffix == '.csv':
+            sites = list(csv.DictReader(f))
+        elif suffix in ('.yaml', '.yml'):
+            yaml = optional_module('yaml')
+            if yaml is None:
+                raise RuntimeError("YAML manifests need PyYAML (pip install pyyaml)")
+            sites = yaml.safe_load(f)
+        elif suffix == '.json':
+            sites = json.load(f)
+        else:
+            raise ValueError(f"Unsupported manifest type: {path.name} (use .json, .yaml or .csv)")
+    
+    # Allow either a bare list or {"sites": [...]}
+    if isinstance(sites, dict):
+        sites = sites.get('sites')
+    if not isinstance(sites, list):
+        raise ValueError(f"Manifest {path.name} must contain a list of sites")
+    
+    entries = []
+    for number, site in enumerate(sites, 1):
+        if not isinstance(site, dict):
+            raise ValueError(f"Site #{number} in {path.name} is not a mapping")
+        
+        # Blank CSV cells count as missing
+        entry = {key: str(site[key]).strip() for key in MANIFEST_FIELDS if site.get(key) not in (None, '')}
+        entry['number'] = number
+        
+        # Site directories and policy files are relative to the manifest file
+        for key in ('directory', 'hints'):
+            if key in entry:
+                entry[key] = str(path.parent / entry[key])
+        entries.append(entry)
+    
+    return entries
+
+def resolve_site_meta(site):
+    """Turn a manifest entry into index page meta, raises ValueError if incomplete"""
+    missing = [key for key in ('directory', 'name', 'location') if key not in site]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    
+    if 'category' in site:
+        if site['category'] not in category_templates():
+            raise ValueError(f"invalid category {site['category']!r}")
+        meta = apply_template(site['category'], site['name'], site['location'])
+    else:
+        missing = [key for key in META_FIELDS if key not in site]
+        if missing:
+            raise ValueError(f"needs a category or {', '.join(missing)}")
+        meta = {key: extract_text_from_meta(site[key]) for key in META_FIELDS}
+    
+    meta['name'] = site['name']
+    meta['location'] = site['location']
+    meta['ga_id'] = site.get('ga_id')
+    meta['ga_mode'] = site.get('ga_mode')
+    if meta['ga_mode'] and meta['ga_mode'] not in GA_MODES:
+        raise ValueError(f"invalid ga_mode {meta['ga_mode']!r} (use {', '.join(GA_MODES)})")
+    meta['site_url'] = site.get('site_url')
+    meta['hints'] = site.get('hints')
+    return meta
+
+def process_manifest(path, state_file=None, options=None, changes=None, profile=None):
+    """Apply every site in a manifest with one shared worker pool, returns failed count
+
+    options (see new_options) are passed through to process_html_files;
+    ga_mode, site_url and hints in a manifest entry override them for
+    that site.
+    """
+    options = new_options(options)
+    sites = load_manifest(path)
+    state = load_state(state_file) if state_file else None
+    
+    print(f"\n📋 Manifest {path}: {len(sites)} site(s)")
+    
+    results = []
+    executor = make_executor(options.workers, options.backend)
+    try:
+        for site in sites:
+            label = site.get('directory', f"site #{site['number']}")
+            print("\n" + "="*60)
+            print(f"🌐 {label}")
+            print("="*60)
+            
+            try:
+                meta = resolve_site_meta(site)
+            except ValueError as e:
+                print(f"\n❌ Skipping site #{site['number']}: {e}")
+                results.append((label, 0, 0, False))
+                continue
+            
+            site_options = new_options(options, site_url=meta['site_url'] or options.site_url,
+                                       hints=meta['hints'] or options.hints,
+                                       ga_mode=meta['ga_mode'] or options.ga_mode)
+            updated, total = process_html_files(
+                site['directory'],
+                meta['title'],
+                meta['desc'],
+                meta['keywords'],
+                meta['name'],
+                meta['location'],
+                meta['ga_id'],
+                site_options,
+                executor=executor,
+                confirm=False,
+                state=state,
+                changes=changes,
+                profile=profile
+            )
+            results.append((label, updated, total, total > 0))
+    finally:
+        if executor:
+            executor.shutdown()
+        if state_file and not options.dry_run:
+            save_state(state_file, state)
+    
+    failed = 0
     print("\n" + "="*60)
-    print(f"✅ Successfully updated {updated}/{len(html_files)} files!")
+    print("📊 BATCH SUMMARY")
+    print("="*60)
+    for label, updated, total, ok in results:
+        if ok and updated == total:
+            print(f"✅ {label}: {updated}/{total}")
+        else:
+            print(f"❌ {label}: {updated}/{total}")
+            failed += 1
+    print("="*60)
+    print(f"✅ {len(results) - failed}/{len(results)} sites fully updated")
     print("="*60 + "\n")
+    
+    return failed
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--engine', choices=ENGINES, default=DEFAULT_ENGINE,
+                        help="rewrite engine: 'scan' (single pass over <head>), 'regex' (original re.sub passes) "
+                             "or 'bytes' (scan on the raw page in its declared charset)")
+    parser.add_argument('--workers', type=int, default=1, metavar='N',
+                        help="process files in parallel with N workers (0 = one per CPU, default: 1)")
+    parser.add_argument('--backend', choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help="worker pool for --workers: 'process' (CPU-bound) or 'thread' (I/O-bound)")
+    parser.add_argument('--ga-mode', choices=GA_MODES, default=DEFAULT_GA_MODE,
+                        help="when gtag.js loads: 'sync' (stock snippet), after 'load', when 'idle' after load, or on first 'interaction'")
+    parser.add_argument('--manifest', metavar='FILE',
+                        help="run non-interactively over every site listed in a JSON/YAML/CSV manifest")
+    parser.add_argument('--state', metavar='FILE',
+                        help="JSON file of content hashes from previous runs; unchanged pages are skipped")
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help="also process HTML files in subfolders")
+    parser.add_argument('--include', action='append', metavar='GLOB',
+                        help=f"only process files matching GLOB (repeatable, default: {' '.join(DEFAULT_INCLUDES)})")
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                        help=f"skip files/folders matching GLOB (repeatable, always skips: {' '.join(DEFAULT_EXCLUDES)})")
+    parser.add_argument('--head-only', action='store_true',
+                        help="read and rewrite only up to </head>, streaming the rest of each page unchanged")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="write nothing, show what would change in each page's <head>")
+    parser.add_argument('--diff-format', choices=DIFF_FORMATS, default='unified',
+                        help="dry-run output: 'unified' diffs or a 'json' change list (default: unified)")
+    parser.add_argument('--diff-out', metavar='FILE',
+                        help="write dry-run output to FILE instead of the console")
+    parser.add_argument('--products', action='store_true',
+                        help=f"also render a static page per {CATALOG_PATH} product into {PRODUCTS_DIR}/")
+    parser.add_argument('--site-url', metavar='URL',
+                        help="public site URL (e.g. https://example.com) for canonical, og:image and sitemap links")
+    parser.add_argument('--sitemap', action='store_true',
+                        help=f"update {SITEMAP_NAME} with every processed page (needs --site-url)")
+    parser.add_argument('--sitemap-exclude', action='append', default=[], metavar='GLOB',
+                        help=f"leave pages matching GLOB out of the sitemap (repeatable, always leaves out: {' '.join(SITEMAP_EXCLUDES)})")
+    parser.add_argument('--inline-fragments', action='store_true',
+                        help="copy fetched fragments (navbar.html, footer.html) into each page; the runtime fetch stays as a fallback")
+    parser.add_argument('--hints', metavar='POLICY',
+                        help="add preconnect/preload/defer hints to each <head> per a JSON/YAML policy file and report blocking bytes")
+    parser.add_argument('--minify', action='store_true',
+                        help="minify pages and their inline CSS/JS on write (<pre>/<textarea> are left alone)")
+    parser.add_argument('--minify-cache', default=MINIFY_CACHE_DIR, metavar='DIR',
+                        help=f"folder of already minified pages and blocks, keyed by content hash ('' to disable, default: {MINIFY_CACHE_DIR})")
+    parser.add_argument('--precompress', action='store_true',
+                        help="write .br (needs the brotli package) and .gz sidecars next to every page")
+    parser.add_argument('--precompress-assets', action='store_true',
+                        help="with --precompress, also compress css/*.css and js/*.js")
+    parser.add_argument('--compress-min-bytes', type=int, default=COMPRESS_MIN_BYTES, metavar='N',
+                        help=f"don't write sidecars for files under N bytes (default: {COMPRESS_MIN_BYTES})")
+    parser.add_argument('--images', action='store_true',
+                        help=f"encode {IMAGES_DIR}/ into resized WebP/AVIF variants (needs Pillow) and report bytes saved and oversized images")
+    parser.add_argument('--srcset', action='store_true',
+                        help=f"point <img> tags at their {SRCSET_FORMAT} variants from --images with srcset/sizes")
+    parser.add_argument('--image-widths', default=','.join(map(str, IMAGE_WIDTHS)), metavar='W,W',
+                        help=f"variant widths in pixels, never wider than the original (default: {','.join(map(str, IMAGE_WIDTHS))})")
+    parser.add_argument('--image-formats', default=','.join(IMAGE_FORMATS), metavar='FMT,FMT',
+                        help=f"variant formats (default: {','.join(IMAGE_FORMATS)})")
+    parser.add_argument('--image-quality', type=int, default=IMAGE_QUALITY, metavar='Q',
+                        help=f"variant quality, 1-100 (default: {IMAGE_QUALITY})")
+    parser.add_argument('--max-image-kb', type=int, default=OVERSIZED_BYTES // 1024, metavar='KB',
+                        help=f"flag images larger than KB (default: {OVERSIZED_BYTES // 1024})")
+    parser.add_argument('--img-dimensions', action='store_true',
+                        help="add width/height to <img> tags that have neither, from the image headers (CSS should set height: auto)")
+    parser.add_argument('--dimension-index', default=DIMENSION_INDEX, metavar='FILE',
+                        help=f"image size index kept between runs ('' to disable, default: {DIMENSION_INDEX})")
+    parser.add_argument('--extract-meta', action='store_true',
+                        help="give pages without a template keywords and a description from their own text (TF-IDF over the site)")
+    parser.add_argument('--term-index', default=TERM_INDEX, metavar='FILE',
+                        help=f"page term counts kept between runs ('' to disable, default: {TERM_INDEX})")
+    parser.add_argument('--watch', action='store_true',
+                        help="after the run, keep watching the folder and redo only the pages a change affects")
+    parser.add_argument('--poll', action='store_true',
+                        help=f"with --watch, poll every {WATCH_POLL_INTERVAL}s instead of using inotify")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="append wall/CPU time per stage and per page, slowest pages and peak memory to a JSON Lines FILE")
+    parser.add_argument('--profile-prom', metavar='FILE',
+                        help="also write the run's timings as a Prometheus textfile (for node_exporter)")
+    parser.add_argument('--profile-phases', action='store_true',
+                        help="with --profile, also time each regex/scan phase of the rewrite")
+    parser.add_argument('--profile-top', type=int, default=PROFILE_TOP, metavar='N',
+                        help=f"number of slowest pages to report (default: {PROFILE_TOP})")
+    parser.add_argument('--fsync', choices=FSYNC_MODES, default=DEFAULT_FSYNC,
+                        help="durability of rewritten files: 'none', 'file' (fsync each file) or 'dir' (fsync folders once at the end)")
+    return parser.parse_args(argv)
+
+def run_options(args):
+    """Run options namespace (see new_options) from command line options"""
+    return new_options(
+        engine=args.engine,
+        ga_mode=args.ga_mode,
+        workers=args.workers,
+        backend=args.backend,
+        recursive=args.recursive,
+        include=tuple(args.include or DEFAULT_INCLUDES),
+        exclude=DEFAULT_EXCLUDES + tuple(args.exclude),
+        fsync=args.fsync,
+        head_only=args.head_only,
+        dry_run=args.dry_run,
+        products=args.products,
+        site_url=args.site_url,
+        sitemap=args.sitemap,
+        sitemap_exclude=SITEMAP_EXCLUDES + tuple(args.sitemap_exclude),
+        inline=args.inline_fragments,
+        hints=args.hints,
+        minify=args.minify,
+        minify_cache=args.minify_cache or None,
+        precompress_pages=args.precompress,
+        precompress_assets=args.precompress_assets,
+        compress_min_bytes=args.compress_min_bytes,
+        images=args.images,
+        srcset=args.srcset,
+        image_widths=tuple(int(width) for width in args.image_widths.split(',') if width.strip()),
+        image_formats=tuple(fmt.strip().lower() for fmt in args.image_formats.split(',') if fmt.strip()),
+        image_quality=args.image_quality,
+        image_max_bytes=args.max_image_kb * 1024,
+        img_dimensions=args.img_dimensions,
+        dimension_index=args.dimension_index or None,
+        extract=args.extract_meta,
+        term_index=args.term_index or None
+    )
 
 def main():
     """Main function"""
+    args = parse_args()
+    
     print("\n" + "="*60)
     print("🤖 ULTIMATE SEO META TAGS BOT")
     print("="*60)
     
+    if args.watch and (args.manifest or args.dry_run):
+        print("\n❌ --watch keeps the current folder up to date; it can't be combined with --manifest or --dry-run")
+        sys.exit(1)
+    
+    # Dry-run changes collected across all sites
+    changes = [] if args.dry_run else None
+    profile = None
+    if args.profile or args.profile_prom:
+        profile = new_profile(args.profile, args.profile_prom, args.profile_phases, args.profile_top)
+    
+    # Batch mode - no prompts
+    if args.manifest:
+        failed = process_manifest(args.manifest, args.state, run_options(args), changes=changes, profile=profile)
+        if args.dry_run:
+            write_diffs(changes, args.diff_format, args.diff_out)
+        if profile:
+            finish_profile(profile)
+        if failed:
+            sys.exit(1)
+        return
+    
     # Ask if user has meta tags ready
     print("\n📌 Do you already have your INDEX PAGE meta tags ready?")
     has_meta = yes_no("(yes/no): ")
@@ -398,20 +3349,21 @@ def main():
         
         category = get_input("Select category number: ")
         
-        if category not in TEMPLATES:
+        if category not in category_templates():
             print("\n❌ Invalid category!")
             return
         
-        template = TEMPLATES[category]
+        template = category_templates()[category]
         print(f"\n✅ Selected: {template['name']}\n")
         
         shop_name = get_input("Site/Business Name: ")
         location = get_input("Location (City): ")
         
         # Generate meta tags
-        title = template['title'].replace('{name}', shop_name).replace('{location}', location)
-        desc = template['desc'].replace('{name}', shop_name).replace('{location}', location)
-        keywords = template['keywords'].replace('{name}', shop_name).replace('{location}', location)
+        meta = apply_template(category, shop_name, location)
+        title = meta['title']
+        desc = meta['desc']
+        keywords = meta['keywords']
     
     # Ask about Google Analytics
     print("\n📊 Do you have Google Analytics?")
@@ -429,7 +3381,7 @@ def main():
     print(f"\nDescription: {desc}")
     print(f"\nKeywords:    {keywords}")
     if ga_id:
-        print(f"\nGA ID:       {ga_id}")
+        print(f"\nGA ID:       {ga_id} ({args.ga_mode})")
     print("\n" + "="*60)
     print("\n✨ Bot will auto-generate optimized meta tags for:")
     print("   • about.html, contact.html, services.html")
@@ -445,7 +3397,20 @@ def main():
     
     # Process files
     current_dir = os.getcwd()
-    process_html_files(current_dir, title, desc, keywords, shop_name, location, ga_id)
+    state = load_state(args.state) if args.state else None
+    # Watch mode needs hashes to tell its own writes from edits
+    if args.watch and state is None:
+        state = {}
+    process_html_files(current_dir, title, desc, keywords, shop_name, location, ga_id, run_options(args), state=state, changes=changes, profile=profile)
+    if args.dry_run:
+        write_diffs(changes, args.diff_format, args.diff_out)
+    elif args.state:
+        save_state(args.state, state)
+    if profile:
+        finish_profile(profile)
+    
+    if args.watch:
+        watch_site(current_dir, (title, desc, keywords, shop_name, location, ga_id), run_options(args), state, args.state, args.poll)
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,461 @@
+"""
+Core of the SEO Meta Tags Bot, shared by meta-bot.py and meta-bot2.py
+- Page meta from category and per-page templates (template data is
+  only imported when first needed)
+- The <head> rewrite with its patterns compiled once at import, on
+  str or (engine 'bytes') on the raw page in its declared charset
+- rewrite(html, meta) for using the bot from other Python code:
+
+    from meta_bot_core import rewrite
+    html = rewrite(html, {'title': ..., 'desc': ..., 'keywords': ...})
+"""
+
+import codecs
+import re
+import time
+from functools import lru_cache
+
+META_FIELDS = ('title', 'desc', 'keywords')
+TEMPLATE_FIELD_RE = re.compile(r'\{(\w+)\}')
+
+@lru_cache(maxsize=256)
+def compile_template(text):
+    """Split a template into (is_field, text) parts once"""
+    parts = TEMPLATE_FIELD_RE.split(text)
+    return tuple((index % 2 == 1, part) for index, part in enumerate(parts) if part)
+
+def render_template(parts, values):
+    """Fill a compiled template"""
+    return ''.join([values[part] if is_field else part for is_field, part in parts])
+
+def category_templates():
+    """Category templates by number, imported on first use"""
+    from meta_bot_templates import TEMPLATES
+    return TEMPLATES
+
+def page_templates():
+    """Per-page templates by file name, imported on first use"""
+    from meta_bot_templates import PAGE_TEMPLATES
+    return PAGE_TEMPLATES
+
+@lru_cache(maxsize=None)
+def compiled_template(category):
+    """Compiled title/desc/keywords of a category template"""
+    template = category_templates()[category]
+    return {field: compile_template(template[field]) for field in META_FIELDS}
+
+@lru_cache(maxsize=None)
+def compiled_page_template(page_name):
+    """Compiled title/desc/keywords of a page template"""
+    template = page_templates()[page_name]
+    return {field: compile_template(template[field]) for field in META_FIELDS}
+
+@lru_cache(maxsize=1024)
+def render_category(category, shop_name, location):
+    """Rendered category template, memoized per site"""
+    values = {'name': shop_name, 'location': location}
+    return {field: render_template(parts, values) for field, parts in compiled_template(category).items()}
+
+def apply_template(category, shop_name, location):
+    """Fill a category template with shop name and location"""
+    return dict(render_category(category, shop_name, location))
+
+def site_brand(base_title, shop_name):
+    """Shop name as shown in titles"""
+    # Extract shop name from base title (remove everything after –)
+    if '–' in base_title:
+        return base_title.split('–')[0].strip()
+    return shop_name
+
+@lru_cache(maxsize=1024)
+def render_page_meta(page_kind, base_title, base_desc, base_keywords, shop_name, location):
+    """Meta for one site and page kind, memoized (page_kind None = index meta)"""
+    if page_kind is None:
+        return {'title': base_title, 'desc': base_desc, 'keywords': base_keywords}
+    
+    values = {'brand': site_brand(base_title, shop_name), 'location': location, 'keyword': base_keywords.split(",")[0]}
+    return {field: render_template(parts, values) for field, parts in compiled_page_template(page_kind).items()}
+
+def generate_page_meta(page_name, base_title, base_desc, base_keywords, shop_name, location):
+    """Generate smart meta tags for specific pages"""
+    # Every page without its own template shares one cache entry
+    page_kind = page_name if page_name in page_templates() else None
+    return dict(render_page_meta(page_kind, base_title, base_desc, base_keywords, shop_name, location))
+
+
+def extract_text_from_meta(text):
+    """Extract content from meta tag if provided as full HTML"""
+    # If user provided full <title>...</title>, extract content
+    title_match = TITLE_TEXT_RE.search(text)
+    if title_match:
+        return title_match.group(1)
+    
+    # If user provided <meta name="..." content="...">, extract content
+    content_match = CONTENT_ATTR_RE.search(text)
+    if content_match:
+        return content_match.group(1)
+    
+    # Otherwise return as-is
+    return text
+
+
+# Rewrite engines for update_meta_tags: 'scan' walks the <head> once,
+# 'regex' is the original multi-pass re.sub cascade (kept for diffing),
+# 'bytes' is the scan over the undecoded page (see update_meta_tags_bytes)
+ENGINES = ('scan', 'regex', 'bytes')
+DEFAULT_ENGINE = 'scan'
+
+# Candidate tags the scan engine stops at; each hit is then confirmed
+# with a pattern anchored at that position (the first six are the ones
+# the regex engine uses)
+HEAD_TOKEN_RE = re.compile(r'<title>|</title>|<meta|<!--|<script|</head>', re.IGNORECASE)
+TITLE_TAG_RE = re.compile(r'<title>.*?</title>', re.IGNORECASE)
+DESC_META_RE = re.compile(r'<meta\s+name=["\']description["\']\s+content=["\'][^"\']*["\']\s*/?>', re.IGNORECASE)
+KEYWORDS_META_RE = re.compile(r'<meta\s+name=["\']keywords["\']\s+content=["\'][^"\']*["\']\s*/?>', re.IGNORECASE)
+GA_COMMENT_RE = re.compile(r'<!--\s*Google tag.*?</script>', re.DOTALL | re.IGNORECASE)
+GA_LOADER_RE = re.compile(r'<script[^>]*googletagmanager[^>]*>.*?</script>', re.DOTALL | re.IGNORECASE)
+GA_INLINE_RE = re.compile(r'<script[^>]*gtag[^>]*>.*?</script>', re.DOTALL | re.IGNORECASE)
+# The bot's own block: its marker comment and the gtag script that every
+# --ga-mode emits (also Google's stock inline snippet). Only scripts that
+# go on to call gtag('js') or gtag('config') count; a site's own
+# dataLayer pushes are left alone
+GA_MARKER_RE = re.compile(r'<!--\s*Google Analytics(?: \(\w+\))?\s*-->', re.IGNORECASE)
+GA_SNIPPET_RE = re.compile(r'<script>\s*window\.dataLayer\s*=\s*window\.dataLayer\s*\|\|\s*\[\];'
+                           r'(?:(?!</script>).)*?gtag\(\s*["\'](?:js|config)["\'].*?</script>', re.DOTALL | re.IGNORECASE)
+# Line break and indent in front of a removed tag go with it, so
+# re-running on the output gives the same output; the marker also takes
+# the blank line the block puts in front of it
+TAG_INDENT_RE = re.compile(r'\n?[ \t]*\Z')
+BLOCK_INDENT_RE = re.compile(r'\n*[ \t]*\Z')
+# Content of a pasted <title> or <meta ... content="..."> (see extract_text_from_meta)
+TITLE_TEXT_RE = re.compile(r'<title>(.*?)</title>', re.IGNORECASE)
+CONTENT_ATTR_RE = re.compile(r'content=["\']([^"\']*)["\']')
+# Only read, never rewritten: the canonical link and the GA measurement
+# id of a loader URL or gtag('config', ...) call
+CANONICAL_LINK_RE = re.compile(r'<link\s[^>]*rel=["\']canonical["\'][^>]*>', re.IGNORECASE)
+HREF_ATTR_RE = re.compile(r'href=["\']([^"\']*)["\']', re.IGNORECASE)
+GA_ID_RE = re.compile(r'(?:[?&]id=|gtag\(\s*["\']config["\']\s*,\s*["\'])([A-Z]+-[\w-]+)')
+
+# --ga-mode: when gtag.js is fetched. 'sync' is the stock snippet; the
+# others queue gtag() calls in dataLayer and load the library after the
+# load event, when the browser is idle after load, or on first input
+GA_MODES = ('sync', 'load', 'idle', 'interaction')
+DEFAULT_GA_MODE = 'sync'
+GA_TRIGGERS = {
+    'load': "window.addEventListener('load', loadGtag);",
+    'idle': ("window.addEventListener('load', function () {"
+             " if ('requestIdleCallback' in window) requestIdleCallback(loadGtag, {timeout: 5000});"
+             " else setTimeout(loadGtag, 1); });"),
+    'interaction': ("['pointerdown', 'keydown', 'scroll', 'touchstart'].forEach(function (type) {"
+                    " window.addEventListener(type, loadGtag, {once: true, passive: true}); });")
+}
+
+def escape_html(text):
+    """Escape special characters for HTML"""
+    return (text.replace('&', '&amp;')
+                .replace('<', '&lt;')
+                .replace('>', '&gt;')
+                .replace('"', '&quot;')
+                .replace("'", '&#39;'))
+
+@lru_cache(maxsize=1024)
+def build_meta_block(desc, keywords, ga_id=None, ga_mode=DEFAULT_GA_MODE):
+    """Build the block inserted after </title>, memoized per page meta"""
+    new_meta = f'\n  <meta name="description" content="{escape_html(desc)}">'
+    new_meta += f'\n  <meta name="keywords" content="{escape_html(keywords)}">'
+    
+    if ga_id:
+        loader = f"https://www.googletagmanager.com/gtag/js?id={ga_id}"
+        if ga_mode == 'sync':
+            new_meta += '\n\n  <!-- Google Analytics -->'
+            new_meta += f'\n  <script async src="{loader}"></script>'
+        else:
+            new_meta += f'\n\n  <!-- Google Analytics ({ga_mode}) -->'
+        new_meta += '\n  <script>'
+        new_meta += '\n    window.dataLayer = window.dataLayer || [];'
+        new_meta += '\n    function gtag(){dataLayer.push(arguments);}'
+        new_meta += "\n    gtag('js', new Date());"
+        new_meta += f"\n    gtag('config', '{ga_id}');"
+        if ga_mode != 'sync':
+            new_meta += '\n    (function () {'
+            new_meta += '\n      var loaded = false;'
+            new_meta += '\n      function loadGtag() {'
+            new_meta += '\n        if (loaded) return;'
+            new_meta += '\n        loaded = true;'
+            new_meta += "\n        var script = document.createElement('script');"
+            new_meta += '\n        script.async = true;'
+            new_meta += f"\n        script.src = '{loader}';"
+            new_meta += '\n        document.head.appendChild(script);'
+            new_meta += '\n      }'
+            new_meta += f'\n      {GA_TRIGGERS[ga_mode]}'
+            new_meta += '\n    })();'
+        new_meta += '\n  </script>'
+    
+    return new_meta
+
+def phase_done(phases, name, clock):
+    """Add the time since clock to phases[name] (if timing phases), returns the new clock"""
+    if phases is None:
+        return clock
+    now = time.perf_counter()
+    phases[name] = phases.get(name, 0.0) + now - clock
+    return now
+
+def update_meta_tags(html_content, title, desc, keywords, ga_id=None, engine=DEFAULT_ENGINE, ga_mode=DEFAULT_GA_MODE, phases=None):
+    """Update meta tags in HTML content
+
+    The 'bytes' engine takes and returns bytes, the others str.
+    Given a phases dict, seconds spent in each step are added to it.
+    """
+    if ga_mode not in GA_MODES:
+        raise ValueError(f"Unknown GA mode: {ga_mode}")
+    if engine == 'bytes':
+        return update_meta_tags_bytes(html_content, title, desc, keywords, ga_id, ga_mode, phases)
+    clock = time.perf_counter()
+    new_meta = build_meta_block(desc, keywords, ga_id, ga_mode)
+    phase_done(phases, 'meta_block', clock)
+    
+    if engine == 'regex':
+        return update_meta_tags_regex(html_content, title, new_meta, phases, ga_mode)
+    if engine == 'scan':
+        return update_meta_tags_scan(html_content, title, new_meta, phases)
+    raise ValueError(f"Unknown engine: {engine}")
+
+# What each HEAD_TOKEN_RE hit is, for str and bytes pages alike
+HEAD_TOKENS = {token: kind for kind in ('<title>', '</title>', '<meta', '<!--', '<script', '</head>')
+               for token in (kind, kind.encode('ascii'))}
+
+def update_meta_tags_scan(html_content, title, new_meta, phases=None):
+    """Single forward scan over <head>, output rebuilt with one join.
+    
+    Also drops the bot's own GA marker and gtag snippets, with the
+    indent in front of them, so re-runs leave the page unchanged. Tags
+    after </head> are left alone; pages without </head> (fragments)
+    are scanned to the end.
+    """
+    return scan_head(html_content, f'<title>{title}</title>', new_meta, PATTERNS, phases)
+
+def scan_head(html_content, title_tag, new_meta, patterns, phases=None):
+    """The scan engine over str or bytes, with patterns of the same type"""
+    head_token_re = patterns['head_token']
+    title_re = patterns['title']
+    desc_re = patterns['description']
+    keywords_re = patterns['keywords']
+    ga_comment_re = patterns['ga_comment']
+    ga_marker_re = patterns['ga_marker']
+    ga_loader_re = patterns['ga_loader']
+    ga_inline_re = patterns['ga_inline']
+    ga_snippet_re = patterns['ga_snippet']
+    indent_re = patterns['tag_indent']
+    block_indent_re = patterns['block_indent']
+    
+    clock = time.perf_counter()
+    pieces = []
+    insert_at = None
+    last = 0
+    pos = 0
+    
+    while True:
+        token = head_token_re.search(html_content, pos)
+        if not token:
+            break
+        
+        start = token.start()
+        # Unicode case folding lets str patterns match '<ſcript' too
+        tag = HEAD_TOKENS.get(token.group().lower(), '<script')
+        pos = token.end()
+        
+        if tag == '</head>':
+            break
+        
+        if tag == '<title>':
+            match = title_re.match(html_content, start)
+            if match:
+                pieces.append(html_content[last:start])
+                pieces.append(title_tag)
+                last = pos = match.end()
+                if insert_at is None:
+                    insert_at = len(pieces)
+            continue
+        
+        if tag == '</title>':
+            if insert_at is None:
+                pieces.append(html_content[last:pos])
+                last = pos
+                insert_at = len(pieces)
+            continue
+        
+        strip_re = indent_re
+        if tag == '<meta':
+            match = desc_re.match(html_content, start) or keywords_re.match(html_content, start)
+        elif tag == '<!--':
+            match = ga_comment_re.match(html_content, start)
+            if not match:
+                match = ga_marker_re.match(html_content, start)
+                strip_re = block_indent_re
+        else:
+            match = (ga_loader_re.match(html_content, start) or ga_inline_re.match(html_content, start)
+                     or ga_snippet_re.match(html_content, start))
+        
+        if match:
+            # Drop the matched tag and the indent in front of it
+            gap = html_content[last:start]
+            pieces.append(gap[:strip_re.search(gap).start()])
+            last = pos = match.end()
+    
+    pieces.append(html_content[last:])
+    clock = phase_done(phases, 'scan', clock)
+    
+    if insert_at is not None:
+        pieces.insert(insert_at, new_meta)
+    
+    html_content = html_content[:0].join(pieces)
+    phase_done(phases, 'join', clock)
+    return html_content
+
+# The regex engine's removal passes in order, named for --profile-phases.
+# These are the original passes only, so its output stays byte for byte
+# what the bot always wrote (it is kept for diffing against)
+REGEX_REMOVALS = (
+    ('description', DESC_META_RE),
+    ('keywords', KEYWORDS_META_RE),
+    ('ga_comment', GA_COMMENT_RE),
+    ('ga_loader', GA_LOADER_RE),
+    ('ga_inline', GA_INLINE_RE)
+)
+# The original passes never matched a deferred --ga-mode block, so with
+# those modes the bot's marker and snippet (with the blank line and
+# indent in front of them) are removed as well
+REGEX_DEFERRED_REMOVALS = (
+    ('ga_marker', re.compile(r'\n*[ \t]*' + GA_MARKER_RE.pattern, GA_MARKER_RE.flags)),
+    ('ga_snippet', re.compile(r'\n?[ \t]*' + GA_SNIPPET_RE.pattern, GA_SNIPPET_RE.flags))
+)
+TITLE_END_RE = re.compile(r'</title>', re.IGNORECASE)
+
+def update_meta_tags_regex(html_content, title, new_meta, phases=None, ga_mode=DEFAULT_GA_MODE):
+    """Original re.sub cascade over the whole document, with precompiled patterns"""
+    clock = time.perf_counter()
+    
+    # Remove existing title
+    html_content = TITLE_TAG_RE.sub(f'<title>{title}</title>', html_content)
+    clock = phase_done(phases, 'title', clock)
+    
+    # Remove existing description, keywords and Google Analytics
+    removals = REGEX_REMOVALS if ga_mode == 'sync' else REGEX_REMOVALS + REGEX_DEFERRED_REMOVALS
+    for name, pattern in removals:
+        html_content = pattern.sub('', html_content)
+        clock = phase_done(phases, name, clock)
+    
+    # Find </title> and insert new meta tags
+    title_match = TITLE_END_RE.search(html_content)
+    if title_match:
+        insert_point = title_match.end()
+        html_content = html_content[:insert_point] + new_meta + html_content[insert_point:]
+    phase_done(phases, 'insert', clock)
+    
+    return html_content
+
+# Every pattern above by name, for tools that read pages the way the
+# rewrite does (audits, profiling)
+PATTERNS = {
+    'head_token': HEAD_TOKEN_RE,
+    'title': TITLE_TAG_RE,
+    'title_end': TITLE_END_RE,
+    'title_text': TITLE_TEXT_RE,
+    'content_attr': CONTENT_ATTR_RE,
+    'description': DESC_META_RE,
+    'keywords': KEYWORDS_META_RE,
+    'ga_comment': GA_COMMENT_RE,
+    'ga_marker': GA_MARKER_RE,
+    'ga_loader': GA_LOADER_RE,
+    'ga_inline': GA_INLINE_RE,
+    'ga_snippet': GA_SNIPPET_RE,
+    'tag_indent': TAG_INDENT_RE,
+    'block_indent': BLOCK_INDENT_RE,
+    'template_field': TEMPLATE_FIELD_RE,
+    'canonical': CANONICAL_LINK_RE,
+    'href_attr': HREF_ATTR_RE,
+    'ga_id': GA_ID_RE
+}
+
+# The 'bytes' engine: PATTERNS compiled for bytes (all of them are
+# ASCII, so they match in any ASCII compatible charset), and the charset
+# taken from a BOM or a <meta> in the first CHARSET_SCAN bytes, as
+# browsers do. Only the title and meta block are encoded, with
+# characters the charset lacks written as &#NNN; references.
+BYTES_PATTERNS = {name: re.compile(pattern.pattern.encode('ascii'), pattern.flags & ~re.UNICODE)
+                  for name, pattern in PATTERNS.items()}
+CHARSET_SCAN = 1024
+CHARSET_RE = re.compile(rb'<meta\s[^>]*?charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+DEFAULT_CHARSET = 'utf-8'
+BOMS = ((codecs.BOM_UTF8, 'utf-8'), (codecs.BOM_UTF16_LE, 'utf-16-le'), (codecs.BOM_UTF16_BE, 'utf-16-be'))
+
+# Shared by the bot and the audit: the end of <head> in a raw page, and
+# the folders a site walk never goes into
+HEAD_END_RE = re.compile(rb'</head>', re.IGNORECASE)
+DEFAULT_EXCLUDES = ('node_modules', '.git', 'images')
+
+@lru_cache(maxsize=64)
+def charset_codec(label):
+    """Python codec for a charset label, None if unknown"""
+    try:
+        codec = codecs.lookup(label.decode('ascii', 'replace'))
+    except LookupError:
+        return None
+    # Browsers read a declared UTF-16 as UTF-8 (it can't be declared in itself)
+    if codec.name.startswith('utf-16'):
+        return 'utf-8'
+    # ... and Latin-1 and ASCII as windows-1252
+    if codec.name in ('iso8859-1', 'ascii'):
+        return 'cp1252'
+    return codec.name
+
+def page_charset(data):
+    """Charset of a page: BOM, then <meta charset> or http-equiv, then UTF-8"""
+    for bom, name in BOMS:
+        if data[:len(bom)] == bom:
+            return name
+    match = CHARSET_RE.search(data, 0, CHARSET_SCAN)
+    return (match and charset_codec(match.group(1))) or DEFAULT_CHARSET
+
+@lru_cache(maxsize=64)
+def ascii_compatible(charset):
+    """Whether the head's ASCII markup is the same bytes in charset"""
+    markup = '<title></title><meta name="description" content=""></head>'
+    try:
+        return markup.encode(charset) == markup.encode('ascii')
+    except UnicodeError:
+        return False
+
+@lru_cache(maxsize=1024)
+def encoded_meta_block(desc, keywords, ga_id, ga_mode, charset):
+    """build_meta_block in a page's charset, memoized"""
+    return build_meta_block(desc, keywords, ga_id, ga_mode).encode(charset, 'xmlcharrefreplace')
+
+def update_meta_tags_bytes(data, title, desc, keywords, ga_id=None, ga_mode=DEFAULT_GA_MODE, phases=None):
+    """The scan engine on the raw page, returns bytes in the page's charset
+
+    Same output as decoding, scanning and encoding again, but only the
+    new title and meta block are encoded. Charsets that aren't ASCII
+    compatible (UTF-16 with a BOM) go through the str engine instead.
+    """
+    clock = time.perf_counter()
+    charset = page_charset(data)
+    title_tag = f'<title>{title}</title>'.encode(charset, 'xmlcharrefreplace')
+    new_meta = encoded_meta_block(desc, keywords, ga_id, ga_mode, charset)
+    phase_done(phases, 'meta_block', clock)
+    
+    if not ascii_compatible(charset):
+        text = scan_head(data.decode(charset), f'<title>{title}</title>', new_meta.decode(charset), PATTERNS, phases)
+        return text.encode(charset, 'xmlcharrefreplace')
+    return scan_head(data, title_tag, new_meta, BYTES_PATTERNS, phases)
+
+def rewrite(html, meta, engine=DEFAULT_ENGINE, phases=None):
+    """html with meta applied, the entry point for embedding the bot
+
+    meta holds 'title', 'desc' and 'keywords', optionally 'ga_id' and
+    'ga_mode' (see GA_MODES). With engine='bytes' html is the raw page
+    and bytes come back.
+    """
+    return update_meta_tags(html, meta['title'], meta['desc'], meta['keywords'],
+                            meta.get('ga_id'), engine, meta.get('ga_mode') or DEFAULT_GA_MODE, phases)
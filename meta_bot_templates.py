@@ -0,0 +1,187 @@
+"""
+Template data for the SEO Meta Tags Bot, loaded by meta_bot_core on first use
+"""
+
+# Category templates
+TEMPLATES = {
+    '1': {
+        'name': '🍬 Sweets/Mithai Store',
+        'title': '{name} – Fresh Mithai & Sweets Online',
+        'desc': 'Order fresh sweets, mithai, and desserts online from {name}. Premium quality sweets in {location}. Free delivery on orders over ₹199.',
+        'keywords': 'sweets {location}, mithai online, {name}, gulab jamun, rasgulla, kaju katli, online sweets delivery {location}, fresh sweets'
+    },
+    '2': {
+        'name': '👗 Fashion/Clothing Store',
+        'title': '{name} – Trendy Affordable Clothing Online',
+        'desc': 'Shop latest fashion trends online at {name}. Affordable clothing, accessories & more in {location}. Free delivery over ₹199.',
+        'keywords': 'fashion {location}, online clothing, affordable fashion, {name}, trendy clothes {location}, fashion store'
+    },
+    '3': {
+        'name': '📱 Electronics Store',
+        'title': '{name} – Electronics & Gadgets Online',
+        'desc': 'Buy electronics, mobile accessories, and gadgets online from {name}. Best prices in {location}. Free delivery over ₹199.',
+        'keywords': 'electronics {location}, gadgets online, {name}, mobile accessories, online electronics store {location}'
+    },
+    '4': {
+        'name': '🛒 Grocery Store',
+        'title': '{name} – Online Grocery Delivery',
+        'desc': 'Order fresh groceries, vegetables, and daily essentials online from {name}. Fast delivery in {location}. Free delivery over ₹199.',
+        'keywords': 'grocery {location}, online grocery, {name}, vegetables online, daily essentials {location}, grocery delivery'
+    },
+    '5': {
+        'name': '💍 Jewelry Store',
+        'title': '{name} – Jewelry & Ornaments Online',
+        'desc': 'Shop beautiful jewelry, gold, silver, and artificial ornaments online from {name} in {location}. Free delivery over ₹199.',
+        'keywords': 'jewelry {location}, online jewelry, {name}, gold jewelry, artificial jewelry {location}, ornaments online'
+    },
+    '6': {
+        'name': '🍽️ Restaurant/Cafe',
+        'title': '{name} – Best Restaurant in {location}',
+        'desc': 'Experience delicious food at {name}, the best restaurant in {location}. Dine-in, takeaway, and home delivery available.',
+        'keywords': 'restaurant {location}, {name}, best food {location}, home delivery, dine-in {location}, cafe'
+    },
+    '7': {
+        'name': '🏨 Hotel/Resort',
+        'title': '{name} – Hotel & Resort in {location}',
+        'desc': 'Book your stay at {name}, a premium hotel in {location}. Comfortable rooms, great service, and excellent amenities.',
+        'keywords': 'hotel {location}, {name}, resort {location}, accommodation, rooms {location}, hotel booking'
+    },
+    '8': {
+        'name': '🏥 Hospital/Clinic',
+        'title': '{name} – Multispecialty Hospital in {location}',
+        'desc': '{name} is a leading hospital in {location} offering expert medical care, advanced facilities, and 24/7 emergency services.',
+        'keywords': 'hospital {location}, {name}, medical care {location}, doctors, emergency services {location}, healthcare'
+    },
+    '9': {
+        'name': '👨‍⚕️ Doctor Website',
+        'title': 'Dr. {name} – {location} | Book Appointment Online',
+        'desc': 'Consult Dr. {name}, experienced doctor in {location}. Book appointment online for expert medical consultation and treatment.',
+        'keywords': 'doctor {location}, Dr. {name}, medical consultation {location}, book appointment, specialist {location}'
+    },
+    '10': {
+        'name': '🏫 School/College',
+        'title': '{name} – Best School in {location}',
+        'desc': '{name} provides quality education with experienced teachers in {location}. Admission open for new session.',
+        'keywords': 'school {location}, {name}, education {location}, admission, best school {location}, quality education'
+    },
+    '11': {
+        'name': '📚 Coaching Institute',
+        'title': '{name} – Coaching Classes in {location}',
+        'desc': 'Join {name} for expert coaching in {location}. Experienced faculty, proven results, and comprehensive study material.',
+        'keywords': 'coaching {location}, {name}, classes {location}, tuition, exam preparation {location}, coaching institute'
+    },
+    '12': {
+        'name': '🏠 Real Estate',
+        'title': '{name} – Property Dealer in {location}',
+        'desc': 'Find your dream home with {name}, trusted property dealer in {location}. Residential & commercial properties available.',
+        'keywords': 'property {location}, {name}, real estate {location}, buy property, sell property {location}, homes for sale'
+    },
+    '13': {
+        'name': '⚡ Electrician Service',
+        'title': '{name} – Electrician Services in {location}',
+        'desc': 'Professional electrician services by {name} in {location}. Electrical repair, installation, and maintenance. Call now!',
+        'keywords': 'electrician {location}, {name}, electrical services {location}, wiring, repair {location}, electrical work'
+    },
+    '14': {
+        'name': '🔧 Plumber Service',
+        'title': '{name} – Plumber Services in {location}',
+        'desc': 'Expert plumber services by {name} in {location}. Plumbing repair, installation, and emergency services. Quick response!',
+        'keywords': 'plumber {location}, {name}, plumbing services {location}, pipe repair, emergency plumber {location}'
+    },
+    '15': {
+        'name': '🧹 Cleaning Service',
+        'title': '{name} – Professional Cleaning Services in {location}',
+        'desc': 'Get professional cleaning services from {name} in {location}. Home, office, and deep cleaning solutions.',
+        'keywords': 'cleaning service {location}, {name}, professional cleaning {location}, home cleaning, office cleaning {location}'
+    },
+    '16': {
+        'name': '💻 IT/Web Agency',
+        'title': '{name} – Web Development & IT Services in {location}',
+        'desc': '{name} offers web development, app development, and IT solutions in {location}. Professional digital services for your business.',
+        'keywords': 'web development {location}, {name}, IT services {location}, app development, website design {location}, digital agency'
+    },
+    '17': {
+        'name': '⚖️ Law Firm',
+        'title': '{name} – Law Firm & Legal Services in {location}',
+        'desc': '{name} provides expert legal consultation and services in {location}. Experienced lawyers for all your legal needs.',
+        'keywords': 'lawyer {location}, {name}, legal services {location}, law firm, advocate {location}, legal consultation'
+    },
+    '18': {
+        'name': '💼 CA/Finance Firm',
+        'title': '{name} – Chartered Accountant in {location}',
+        'desc': '{name} offers CA services, tax filing, audit, and financial consultation in {location}. Expert accounting solutions.',
+        'keywords': 'chartered accountant {location}, {name}, CA services {location}, tax filing, audit {location}, GST'
+    },
+    '19': {
+        'name': '👨‍💻 Developer Portfolio',
+        'title': '{name} – Web Developer Portfolio | {location}',
+        'desc': 'Professional web developer {name} from {location}. Specialized in modern web development, React, Node.js, and full-stack solutions.',
+        'keywords': 'web developer {location}, {name}, portfolio, React developer, full-stack developer {location}, freelance developer'
+    },
+    '20': {
+        'name': '🎨 Designer Portfolio',
+        'title': '{name} – UI/UX Designer Portfolio | {location}',
+        'desc': 'Creative UI/UX designer {name} from {location}. Expert in user interface design, user experience, and product design.',
+        'keywords': 'UI UX designer {location}, {name}, portfolio, graphic designer, product designer {location}, freelance designer'
+    }
+}
+
+# Per-page meta for the standard pages. {brand} is the shop name taken
+# from the index title, {keyword} the first index keyword.
+PAGE_TEMPLATES = {
+    'about.html': {
+        'title': 'About Us – {brand}',
+        'desc': 'Learn about {brand} in {location}. Our story, mission, and commitment to providing the best products and services.',
+        'keywords': 'about {brand}, {location}, our story, company information, {keyword}'
+    },
+    'contact.html': {
+        'title': 'Contact Us – {brand} | {location}',
+        'desc': 'Contact {brand} in {location}. Get in touch for inquiries, support, or visit our store. We\'re here to help!',
+        'keywords': 'contact {brand}, {location}, phone, email, address, customer support'
+    },
+    'services.html': {
+        'title': 'Our Services – {brand}',
+        'desc': 'Explore services offered by {brand} in {location}. Quality services tailored to your needs.',
+        'keywords': 'services {location}, {brand}, offerings, solutions, {keyword}'
+    },
+    'product-detail.html': {
+        'title': 'Product Details – {brand}',
+        'desc': 'View detailed product information at {brand}. Quality products in {location} with fast delivery.',
+        'keywords': 'products {location}, {brand}, buy online, product details, {keyword}'
+    },
+    'cart.html': {
+        'title': 'Shopping Cart – {brand}',
+        'desc': 'Review your shopping cart at {brand}. Secure checkout and fast delivery in {location}.',
+        'keywords': 'shopping cart, checkout, {brand}, buy online {location}'
+    },
+    'buynow.html': {
+        'title': 'Checkout – {brand}',
+        'desc': 'Complete your purchase at {brand}. Safe and secure checkout with multiple payment options.',
+        'keywords': 'checkout, buy now, {brand}, secure payment, online shopping {location}'
+    },
+    'yourorders.html': {
+        'title': 'Your Orders – {brand}',
+        'desc': 'Track and view your orders from {brand}. Order history and delivery status.',
+        'keywords': 'my orders, order history, {brand}, track order {location}'
+    },
+    'privacy.html': {
+        'title': 'Privacy Policy – {brand}',
+        'desc': 'Read the privacy policy of {brand}. How we protect and handle your personal information.',
+        'keywords': 'privacy policy, {brand}, data protection, privacy {location}'
+    },
+    'terms.html': {
+        'title': 'Terms & Conditions – {brand}',
+        'desc': 'Terms and conditions for using {brand} services. Please read before making a purchase.',
+        'keywords': 'terms conditions, {brand}, legal, terms of service {location}'
+    },
+    'shipping.html': {
+        'title': 'Shipping Policy – {brand}',
+        'desc': 'Shipping and delivery information for {brand}. Delivery times, charges, and areas covered in {location}.',
+        'keywords': 'shipping policy, delivery, {brand}, shipping charges {location}'
+    },
+    'return.html': {
+        'title': 'Return & Refund Policy – {brand}',
+        'desc': 'Return and refund policy for {brand}. Easy returns and hassle-free refunds in {location}.',
+        'keywords': 'return policy, refund, {brand}, easy returns {location}'
+    }
+}